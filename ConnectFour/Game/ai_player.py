@@ -1,20 +1,35 @@
-from .board import Board
-from .win_detector import WinDetector
-import copy
-import random
+from .evaluator import ThreatEvaluator, max_score
+from .search_stats import SearchStats, START, DEPTH, DONE
+from .solver import Solver, SolverTimeout
+from .transposition_table import TranspositionTable, EXACT, LOWER_BOUND, \
+    UPPER_BOUND
+from .win_detector import sequence_check, WIN_SEQUENCE
+import sys
+import time
 
-BOARD_ROW = 6
-BOARD_COL = 7
 EMPTY_CELL = 0
-ITERATIONS = 2
 PLAYER_A = 1
 PLAYER_B = 2
+# the lowest score of a win before the disks of the game are taken off it,
+# boards with higher ratings score their wins higher (see get_sure_win).
 SURE_WIN = 1000
-SURE_LOSE = -100
-POSS_WIN = 5
-POSS_LOSE = -1
-MIN_ITERATIONS = 1
-TIMEOUT_LIMIT = 150
+TIE_SCORE = 0
+DEFAULT_DEPTH = 8
+# number of searched positions between two checks of the clock - well
+# under a millisecond of search.
+CLOCK_CHECK_NODES = 64
+# milliseconds before the timeout that the search stops, so that the time
+# between two checks of the clock and the time to return from the search do
+# not go past it.
+TIMEOUT_MARGIN = 1
+# positions with this many empty cells or less are solved exactly.
+DEFAULT_SOLVER_THRESHOLD = 18
+
+
+class SearchTimeout(Exception):
+    """
+    raised inside the search when its deadline has passed.
+    """
 
 
 class AI:
@@ -23,25 +38,90 @@ class AI:
     game turns.
     """
 
-    def __init__(self, game, player):
+    def __init__(self, game, player, depth=DEFAULT_DEPTH, table=None,
+                 book=None, workers=1, seed=None, stats=False,
+                 solver_threshold=DEFAULT_SOLVER_THRESHOLD):
         """
         constructor of the class. defines the fields of the objects.
-        :param game: game object
+        :param game: game object, of any board size and win length
         :param player: player number
+        :param depth: number of moves (of both players) to look ahead
+        :param table: transposition table to remember searched positions in.
+        if None, the AI creates its own table, that is kept for all the
+        moves of the game.
+        :param book: opening book object. positions that are in the book
+        are not searched. books are of four in a row, so they are not used
+        for other win lengths.
+        :param workers: number of processes to search with. with more than
+        one, the possible moves are searched in parallel (see
+        parallel_search).
+        :param seed: seed for choosing between equally rated moves in a
+        parallel search. with a seed the parallel search is reproducible.
+        :param stats: whether to collect statistics of every search (see
+        get_last_stats).
+        :param solver_threshold: number of empty cells from which on the
+        position is solved exactly instead of searched (see Solver). 0 to
+        never solve.
         """
         self.__game = game
+        self.__rows, self.__cols = game.get_size()
+        self.__win_length = game.get_win_length()
+        self.__col_bits = self.__rows + 1
+        self.__has_win = sequence_check(self.__win_length)
+        self.__sure_win = get_sure_win(self.__rows, self.__cols,
+                                       self.__win_length)
+        # a win score above this means that the winner is already known.
+        self.__known_result = self.__sure_win - self.__rows * self.__cols
+        # columns ordered from the center out - central moves are usually
+        # better, and searching them first makes the alpha-beta pruning cut
+        # more branches.
+        self.__move_order = sorted(range(self.__cols),
+                                   key=lambda c: abs(self.__cols // 2 - c))
         self.__player = player
         if self.__player == PLAYER_A:
             self.__opponent = PLAYER_B
         else:
             self.__opponent = PLAYER_A
+        self.__depth = depth
+        if table is None:
+            table = TranspositionTable()
+        self.__table = table
+        self.__book = book
+        self.__workers = workers
+        self.__seed = seed
+        self.__stats_enabled = stats
+        self.__hooks = []
+        self.__last_stats = None
+        self.__solver_threshold = solver_threshold
+        self.__solver = Solver(self.__rows, self.__cols,
+                               win_length=self.__win_length)
+        self.__last_solution = None
+        # the result cache is loaded by result_cache.configure, so it is
+        # looked up here instead of imported - a process that does not use
+        # it does not pay for loading it.
+        self.__result_cache = sys.modules.get(__package__ + ".result_cache")
 
-        self.__board = self.__build_board()
-        self.__win_detect = WinDetector(self.__board)
-
-        self.__possible_columns = []
-        self.__moves_rating = {}
+        self.__board = game.get_board()
+        # the moves of the game that are on the board
+        self.__board_moves = game.get_moves()
+        # the moves that were found on the opponent's time (see ponder), by
+        # the moves of the game after the reply of the opponent - tuples of
+        # the depth, the move, the solver result and the score.
+        self.__pondered = {}
+        self.__evaluator = ThreatEvaluator(self.__rows, self.__cols,
+                                           self.__win_length)
         self.__last_move = None
+        self.__last_depth = 0
+        self.__last_score = None
+        self.__nodes = 0
+        # the counters of the statistics are updated only in a search with
+        # statistics, so a search without them does not pay for them.
+        self.__counting = False
+        self.__leaf_evals = 0
+        self.__win_checks = 0
+        self.__cutoffs = 0
+        self.__deadline = None
+        self.__stop = None
 
     # public methods
     def get_last_found_move(self):
@@ -51,74 +131,470 @@ class AI:
         """
         return self.__last_move
 
-    def find_legal_move(self, timeout=None):
+    def get_last_search_depth(self):
         """
-        method that is responsible for finding the AI's next move.
-        :param timeout: time counter
-        :return: move as column
+        method that returns the depth of the last completed search.
+        :return: depth, 0 for a book move and the number of empty cells for
+        a solved one
+        """
+        return self.__last_depth
+
+    def get_last_score(self):
+        """
+        method that returns the score of the last found move, by the last
+        completed depth of its search.
+        :return: score - positive if the AI is winning, None if the move was
+        not searched in this process (a book or parallel move).
+        """
+        return self.__last_score
+
+    def get_last_search_nodes(self):
+        """
+        method that returns the number of positions that the last search (or
+        solve) visited in this process.
+        :return: number of positions
+        """
+        return self.__nodes
+
+    def get_transposition_table(self):
+        """ Getter """
+        return self.__table
+
+    def get_last_solution(self):
+        """
+        method that returns the exact result of the last move, if it was
+        found by the solver.
+        :return: tuple of the result (solver.WIN, DRAW or LOSS, for the AI)
+        and the number of moves (of both players) until the game ends. None
+        if the last move was searched.
+        """
+        return self.__last_solution
+
+    def get_last_stats(self):
+        """
+        method that returns the statistics of the last search, if statistics
+        are enabled.
+        :return: SearchStats object, None if statistics are disabled.
+        """
+        return self.__last_stats
+
+    def get_stats_enabled(self):
+        """ Getter """
+        return self.__stats_enabled
+
+    def set_stats_enabled(self, enabled):
+        """ Setter """
+        self.__stats_enabled = enabled
+        if not enabled:
+            self.__last_stats = None
+
+    def add_hook(self, hook):
+        """
+        method that adds a function that is called during every search, and
+        enables the statistics. the function gets the event - START when the
+        search starts, DEPTH when a depth is completed and DONE when the move
+        is found - and the SearchStats of the search.
+        :param hook: function of (event, stats)
+        """
+        self.__hooks.append(hook)
+        self.__stats_enabled = True
+
+    def remove_hook(self, hook):
+        """
+        method that removes a function that was added with add_hook.
+        """
+        self.__hooks.remove(hook)
+
+    def find_legal_move(self, timeout=None, stop=None):
+        """
+        method that is responsible for finding the AI's next move. searches
+        the moves with iterative deepening - depth 1, 2, 3... every depth
+        starts from the best move of the previous one.
+        :param timeout: time limit in milliseconds. if given, the search goes
+        deeper until the time is up, and the best move of the last completed
+        depth is returned. otherwise searches up to the depth of the AI.
+        :param stop: threading.Event, that another thread sets to end the
+        search early, like a timeout. a parallel search is not stopped.
+        :return: move as column. if the result cache was on when the AI was
+        created (see result_cache), a position that was searched with the
+        same settings gets the move of that search.
         """
         if self.__game.get_winner() is not None:
             raise AttributeError("No possible AI moves.")
 
-        iterations = ITERATIONS
-        if timeout is not None and timeout < TIMEOUT_LIMIT:
-            iterations = MIN_ITERATIONS
+        stats = None
+        if self.__stats_enabled:
+            stats = SearchStats()
+            self.__last_stats = stats
+            self.__call_hooks(START, stats)
+        cache = None
+        if self.__result_cache is not None:
+            cache = self.__result_cache.get_cache()
+        if cache is None:
+            self.__last_move = self.__find_move(timeout, stop, stats)
+        else:
+            self.__last_move = self.__find_cached_move(cache, timeout, stop,
+                                                       stats)
+        if stats is not None:
+            stats.move = self.__last_move
+            self.__call_hooks(DONE, stats)
+        return self.__last_move
 
+    def ponder(self, stop, max_depth=None):
+        """
+        method that searches on the opponent's time, until the stop event is
+        set. every possible reply of the opponent is searched with iterative
+        deepening - the reply that the transposition table predicts first -
+        and the best move after it is kept. if the opponent plays a reply
+        that was searched deep enough, find_legal_move returns its move at
+        once. otherwise its search goes on from the pondered depth and move,
+        with a warm transposition table - so with a timeout, the time of
+        the move goes to deeper depths.
+        ponder must not run at the same time as another search of this AI,
+        so the caller stops it (and waits for it) before the game goes on.
+        :param stop: threading.Event that ends the pondering
+        :param max_depth: the deepest search, None for the depth of the AI.
+        an AI that searches with a timeout gains from deeper pondering.
+        """
+        self.__pondered = {}
+        if (self.__game.get_winner() is not None or
+                self.__game.get_current_player() != self.__opponent):
+            return
+        self.__start_clock(None, stop)
         self.__update_self_board()
+        self.__evaluator.set_board(self.__board)
+        self.__table.new_search()
+        board = self.__board
+        moves = self.__board_moves
+        empty = self.__rows * self.__cols - len(moves) - 1
+        replies = self.__get_poss_moves(board, self.__predict_reply(board))
+        try:
+            if empty <= self.__solver_threshold:
+                for reply in replies:
+                    self.__ponder_solve(board, moves + [reply], stop)
+                return
+            if max_depth is None:
+                max_depth = self.__depth
+            for depth in range(1, max_depth + 1):
+                done = True
+                for reply in replies:
+                    done &= self.__ponder_search(board, moves + [reply],
+                                                 depth)
+                if done:
+                    return
+        except (SearchTimeout, SolverTimeout):
+            return
 
-        self.__init_moves_rating(self.__board)
+    def rate_move(self, col, depth, timeout=None, stop=None, alpha=None):
+        """
+        method that rates one possible move of the AI with a negamax search of
+        the given depth.
+        :param col: column of the move
+        :param depth: number of moves to look ahead, including the rated move
+        :param timeout: time limit in milliseconds. if the time is up before
+        the search is over, raises SearchTimeout.
+        :param stop: threading.Event - if it is set before the search is over,
+        raises SearchTimeout.
+        :param alpha: score that the AI is already assured of by another
+        move, None if there is none. a move that is not better is cut early.
+        :return: score - positive if the AI is winning. if it is not above
+        alpha, it is only a bound - the move scores that much or less.
+        """
+        if alpha is None:
+            alpha = -self.__sure_win
+        self.__start_clock(timeout, stop)
+        self.__update_self_board()
+        self.__evaluator.set_board(self.__board)
+        self.__nodes = 0
+        board = self.__board
+        disks = sum(board.get_col_height(j) for j in range(self.__cols))
+        move = self.__try_to_move(board, col, self.__player)
+        if not move:
+            raise ValueError("Illegal move")
+        self.__evaluator.make_move(move[0], col, self.__player)
+        try:
+            if self.__has_win(board.get_player_bits(self.__player),
+                              self.__col_bits):
+                return self.__sure_win - (disks + 1)
+            return -self.__negamax(board, depth - 1, -self.__sure_win,
+                                   -alpha, self.__opponent, disks + 1)
+        finally:
+            board.undo_move(col)
+            self.__evaluator.undo_move(move[0], col, self.__player)
 
-        # rating the optional moves
-        self.__update_moves_rating(self.__board, iterations)
-        # choosing the best rates move
-        self.__last_move = self.__choose_col()
-        return self.__last_move
+    def __find_move(self, timeout, stop, stats):
+        """
+        private method that finds the AI's next move - from the opening book,
+        with a parallel search or with a search in this process.
+        :param timeout: time limit in milliseconds, None for no limit
+        :param stop: threading.Event that ends the search, or None
+        :param stats: SearchStats object to fill, None if statistics are
+        disabled
+        :return: move as column
+        """
+        self.__start_clock(timeout, stop)
+        max_depth = self.__depth
+        if timeout is not None:
+            max_depth = self.__rows * self.__cols
+
+        start = time.perf_counter()
+        self.__update_self_board()
+        self.__evaluator.set_board(self.__board)
+        self.__last_solution = None
+        self.__last_score = None
+        self.__nodes = 0
+
+        if self.__book is not None and self.__win_length == WIN_SEQUENCE:
+            book_move = self.__book.get_move(self.__board, self.__player)
+            if book_move is not None:
+                self.__last_depth = 0
+                if stats is not None:
+                    stats.source = "book"
+                return book_move
 
-    def __build_board(self):
+        pondered = self.__pondered.get(tuple(self.__board_moves))
+        if pondered is not None and pondered[0] >= max_depth:
+            (self.__last_depth, best_col, self.__last_solution,
+             self.__last_score) = pondered
+            if stats is not None:
+                stats.source = "ponder"
+            return best_col
+
+        disks = sum(self.__board.get_col_height(j) for j in range(self.__cols))
+        if self.__rows * self.__cols - disks <= self.__solver_threshold:
+            solver_timeout = None
+            if timeout is not None:
+                # the rest of the time is left for a search, if the
+                # solver does not make it.
+                solver_timeout = timeout / 2
+            try:
+                scores = self.__solver.solve_moves(self.__board,
+                                                   self.__player,
+                                                   solver_timeout, stop)
+            except SolverTimeout:
+                pass
+            else:
+                best_col = max(scores, key=lambda col: scores[col])
+                self.__last_solution = self.__solver.get_result(
+                    scores[best_col], disks)
+                self.__nodes = self.__solver.get_nodes()
+                # the solver searches to the end of the game
+                self.__last_depth = self.__rows * self.__cols - disks
+                self.__last_score = self.__solver_score(scores[best_col])
+                if stats is not None:
+                    stats.source = "solver"
+                    stats.nodes = self.__nodes
+                    stats.seconds = time.perf_counter() - start
+                return best_col
+
+        if self.__workers > 1:
+            # imported here since parallel_search imports this module.
+            from . import parallel_search
+            best_col, self.__last_depth = parallel_search.search(
+                self.__game.get_moves(), self.__player, max_depth, timeout,
+                self.__workers, self.__seed, self.__rows, self.__cols,
+                self.__win_length)
+            if stats is not None:
+                stats.source = "parallel"
+                stats.seconds = time.perf_counter() - start
+            return best_col
+
+        self.__table.new_search()
+        if stats is not None:
+            table_before = self.__table.get_stats()
+        self.__nodes = 0
+        self.__counting = stats is not None
+        self.__leaf_evals = 0
+        self.__win_checks = 0
+        self.__cutoffs = 0
+        self.__last_depth = 0
+        # fallback in case not even the first depth is completed.
+        best_col = self.__get_poss_moves(self.__board)[0]
+        if pondered is not None:
+            # the search goes on from the depth that was searched while
+            # pondering, its positions are still in the table.
+            self.__last_depth, best_col, _, self.__last_score = pondered
+            if stats is not None:
+                stats.source = "ponder"
+        for depth in range(self.__last_depth + 1, max_depth + 1):
+            try:
+                best_col, score = self.__search_root(self.__board, depth,
+                                                     best_col)
+            except SearchTimeout:
+                break
+            self.__last_depth = depth
+            self.__last_score = score
+            if stats is not None:
+                stats.depths.append((depth, time.perf_counter() - start,
+                                     best_col, score))
+                self.__call_hooks(DEPTH, stats)
+            if abs(score) >= self.__known_result:
+                break
+
+        if stats is not None:
+            table_after = self.__table.get_stats()
+            stats.seconds = time.perf_counter() - start
+            stats.nodes = self.__nodes
+            stats.leaf_evals = self.__leaf_evals
+            stats.win_checks = self.__win_checks
+            stats.cutoffs = self.__cutoffs
+            stats.tt_hits = table_after["hits"] - table_before["hits"]
+            stats.tt_misses = table_after["misses"] - table_before["misses"]
+            stats.principal_variation = self.__principal_variation(
+                best_col, self.__last_depth)
+        return best_col
+
+    def __find_cached_move(self, cache, timeout, stop, stats):
         """
-        copies the game board.
-        :return: board
+        private method that finds the AI's next move in the result cache, or
+        finds it with __find_move and adds it to the cache. the moves of the
+        cache are of the canonical positions, so a position and its mirror
+        image share their move.
+        :param cache: ResultCache object
+        :return: move as column
         """
-        board = Board(BOARD_ROW, BOARD_COL)
+        self.__update_self_board()
+        key, mirrored = self.__board.get_canonical_key(self.__player)
+        book = None
+        if self.__book is not None:
+            book = self.__book.get_digest()
+        cache_key = (self.__rows, self.__cols, self.__win_length, key,
+                     self.__depth, timeout, self.__solver_threshold, book,
+                     self.__workers, self.__seed)
+        result = cache.get(cache_key)
+        if result is not None:
+            col, self.__last_score, self.__last_depth, solution = result
+            self.__last_solution = solution
+            if stats is not None:
+                stats.source = "cache"
+            return self.__mirror_col(col, mirrored)
+        col = self.__find_move(timeout, stop, stats)
+        if stop is None or not stop.is_set():
+            # a stopped search is not as deep as its settings
+            cache.put(cache_key, (self.__mirror_col(col, mirrored),
+                                  self.__last_score, self.__last_depth,
+                                  self.__last_solution))
+        return col
 
-        for i in range(BOARD_ROW):
-            for j in range(BOARD_COL):
-                player = self.__game.get_player_at(i, j)
-                if player:
-                    board.make_move(i, j, player)
-        return board
+    def __start_clock(self, timeout, stop):
+        """
+        sets the deadline of a new search.
+        """
+        self.__counting = False
+        self.__stop = stop
+        self.__deadline = None
+        if timeout is not None:
+            self.__deadline = (time.monotonic() +
+                               max(0, timeout - TIMEOUT_MARGIN) / 1000)
+        elif stop is not None:
+            # the clock is checked for the stop event as well
+            self.__deadline = float("inf")
 
     def __update_self_board(self):
         """
-        updates the board according to the 2 previous moves.
+        updates the board to the moves of the game - takes back the moves of
+        the board that are not in the game, and makes the new moves of the
+        game.
         :return: None
         """
-        if self.__last_move is not None:
-            self.__try_to_move(self.__board, self.__last_move, self.__player)
-        for col in range(BOARD_COL):
-            row = (BOARD_ROW - 1) - self.__board.get_col_dict()[col]
-            player = self.__game.get_player_at(row, col)
-            if player:
-                self.__board.make_move(row, col, player)
+        moves = self.__game.get_moves()
+        played = self.__board_moves
+        same = 0
+        while (same < len(moves) and same < len(played) and
+               moves[same] == played[same]):
+            same += 1
+        for col in reversed(played[same:]):
+            self.__board.undo_move(col)
+        for idx in range(same, len(moves)):
+            player = PLAYER_A if idx % 2 == 0 else PLAYER_B
+            self.__try_to_move(self.__board, moves[idx], player)
+        self.__board_moves = moves
 
-    # private methods
-    def __choose_col(self):
+    def __predict_reply(self, board):
         """
-        private method tht chooses the best rated possible move. after rating
-        them in the dictionary.
-        :return: column number (of this move)
+        :return: the best move of the opponent by the transposition table,
+        None if the position of the opponent was not searched.
         """
-        col = max(self.__moves_rating, key=lambda i: self.__moves_rating[i])
-        max_val = self.__moves_rating[col]
+        key, mirrored = board.get_canonical_key(self.__opponent)
+        entry = self.__table.get(key)
+        if entry is None:
+            return None
+        return self.__mirror_col(entry[4], mirrored)
 
-        options = [i for i in self.__moves_rating if
-                   self.__moves_rating[i] == max_val]
+    def __ponder_search(self, board, moves, depth):
+        """
+        searches the best move after a reply of the opponent, and keeps it
+        for find_legal_move.
+        :param board: board before the reply
+        :param moves: moves of the game after the reply
+        :param depth: search depth
+        :return: True if the reply needs no deeper search
+        """
+        reply = moves[-1]
+        previous = self.__pondered.get(tuple(moves))
+        if previous is not None and previous[0] >= depth:
+            return True
+        row = self.__try_to_move(board, reply, self.__opponent)[0]
+        self.__evaluator.make_move(row, reply, self.__opponent)
+        try:
+            if (self.__has_win(board.get_player_bits(self.__opponent),
+                               self.__col_bits) or
+                    not self.__get_poss_moves(board)):
+                return True  # the game is over, there is nothing to search
+            first_col = self.__get_poss_moves(board)[0]
+            if previous is not None:
+                first_col = previous[1]
+            best_col, score = self.__search_root(board, depth, first_col)
+        finally:
+            board.undo_move(reply)
+            self.__evaluator.undo_move(row, reply, self.__opponent)
+        if abs(score) >= self.__known_result:
+            depth = self.__rows * self.__cols
+        self.__pondered[tuple(moves)] = (depth, best_col, None, score)
+        return depth == self.__rows * self.__cols
 
-        if len(options) > 1:
-            col = random.choice(options)
+    def __ponder_solve(self, board, moves, stop):
+        """
+        solves the position after a reply of the opponent, and keeps the best
+        move for find_legal_move.
+        :param board: board before the reply
+        :param moves: moves of the game after the reply
+        :param stop: threading.Event that ends the solving
+        """
+        reply = moves[-1]
+        self.__try_to_move(board, reply, self.__opponent)
+        try:
+            if (self.__has_win(board.get_player_bits(self.__opponent),
+                               self.__col_bits) or
+                    not self.__get_poss_moves(board)):
+                return
+            scores = self.__solver.solve_moves(board, self.__player,
+                                               stop=stop)
+        finally:
+            board.undo_move(reply)
+        best_col = max(scores, key=lambda col: scores[col])
+        self.__pondered[tuple(moves)] = (
+            self.__rows * self.__cols, best_col,
+            self.__solver.get_result(scores[best_col], len(moves)),
+            self.__solver_score(scores[best_col]))
 
-        return col
+    def __solver_score(self, score):
+        """
+        private method that translates a score of the solver to the score of
+        the search.
+        :param score: solver score of the AI's move (see Solver)
+        :return: the score that a search to the end of the game gives the
+        move
+        """
+        if score == 0:
+            return TIE_SCORE
+        # the solver scores a win by the empty cells after it, plus one
+        win = self.__sure_win - (self.__rows * self.__cols + 1 - abs(score))
+        if score > 0:
+            return win
+        return -win
 
+    # private methods
     def __try_to_move(self, board, move, player):
         """
         method that tries to make a move on the bord.
@@ -127,74 +603,218 @@ class AI:
         :param player:
         :return: If success-the played move, Else- False.
         """
-        row = (BOARD_ROW - 1) - board.get_col_dict()[move]
+        row = (self.__rows - 1) - board.get_col_height(move)
         if board.make_move(row, move, player):
             return row, move
         return False
 
-    def __update_moves_rating(self, board, rounds):
+    def __search_root(self, board, depth, first_col):
         """
-        private method that is responsible for finding the best move. generates
-        every possible move in the given number of next rounds and rates it
-        accordingly.
+        private method that rates every possible move of the AI with a
+        negamax search of the given depth, and returns the best one.
         :param board: board object
-        :param rounds: number of iterations
-        :return: None
+        :param depth: number of moves to look ahead
+        :param first_col: column to search first
+        :return: tuple of column number (of the best move) and its score
         """
-        # base case: no more rounds
-        if not rounds:
-            return
-        # make every possible move - of self
-        my_moves = self.__get_poss_moves(board)
-        for my_curr_move in my_moves:
-            curr_board1 = copy.deepcopy(board)
-            move_res1 = self.__try_to_move(curr_board1, my_curr_move,
-                                           self.__player)
-            if not move_res1:
-                continue
-            if self.__win_detect.is_won(move_res1, self.__player, curr_board1):
-                if rounds == ITERATIONS:  # winning immediately - best opt
-                    self.__moves_rating[my_curr_move] += SURE_WIN
-                    break
-                else:
-                    self.__moves_rating[my_curr_move] += POSS_WIN
-            else:
-                opp_moves = self.__get_poss_moves(curr_board1)
-                for opp_curr_move in opp_moves:
-                    curr_board2 = copy.deepcopy(curr_board1)
-                    move_res2 = self.__try_to_move(curr_board2, opp_curr_move,
-                                                   self.__opponent)
-                    if not move_res2:
-                        continue
-                    if self.__win_detect.is_won(move_res2, self.__opponent,
-                                                curr_board2):
-                        if rounds == ITERATIONS:
-                            self.__moves_rating[my_curr_move] += SURE_LOSE
-                        else:
-                            self.__moves_rating[my_curr_move] += POSS_LOSE
+        disks = sum(board.get_col_height(col) for col in range(self.__cols))
+        key, mirrored = board.get_canonical_key(self.__player)
+        if board.is_symmetric():
+            # the mirrored moves lead to mirrored positions, that have the
+            # same scores - only the left half and the center are searched.
+            first_col = min(first_col, self.__cols - 1 - first_col)
+            moves = [col for col in self.__get_poss_moves(board, first_col)
+                     if col <= self.__cols - 1 - col]
+        else:
+            moves = self.__get_poss_moves(board, first_col)
+        alpha = -self.__sure_win
+        best_col = None
+        for col in moves:
+            row = self.__try_to_move(board, col, self.__player)[0]
+            self.__evaluator.make_move(row, col, self.__player)
+            try:
+                if self.__has_win(board.get_player_bits(self.__player),
+                                  self.__col_bits):
+                    # winning immediately - best opt
+                    return col, self.__sure_win - (disks + 1)
+                score = -self.__negamax(board, depth - 1, -self.__sure_win,
+                                        -alpha, self.__opponent, disks + 1)
+            finally:
+                board.undo_move(col)
+                self.__evaluator.undo_move(row, col, self.__player)
+            if best_col is None or score > alpha:
+                alpha = score
+                best_col = col
+        self.__table.store(key, depth, EXACT, alpha,
+                           self.__mirror_col(best_col, mirrored))
+        return best_col, alpha
+
+    def __negamax(self, board, depth, alpha, beta, player, disks):
+        """
+        private method that rates the board for the given player (the player
+        that its his turn) with negamax search and alpha-beta pruning. the
+        moves are made and taken back on the given board, so the board is
+        left as it was, even if the search times out. positions that were
+        already searched deep enough are taken from the transposition table.
+        :param board: board object
+        :param depth: number of moves to look ahead
+        :param alpha: score that the player is already assured of
+        :param beta: score that the opponent is already assured of
+        :param player: player number
+        :param disks: number of disks on the board
+        :return: score - positive if the player is winning, the faster
+        the win the higher the score. positions that are not decided in the
+        given depth are rated by the threat evaluator.
+        """
+        self.__nodes += 1
+        if (self.__deadline is not None and
+                not self.__nodes % CLOCK_CHECK_NODES and
+                (time.monotonic() > self.__deadline or
+                 self.__stop is not None and self.__stop.is_set())):
+            raise SearchTimeout()
+
+        moves = self.__get_poss_moves(board)
+        if not moves:
+            if self.__counting:
+                self.__leaf_evals += 1
+            return TIE_SCORE
+        # winning immediately ends the search
+        for col in moves:
+            self.__try_to_move(board, col, player)
+            won = self.__has_win(board.get_player_bits(player),
+                                 self.__col_bits)
+            board.undo_move(col)
+            if won:
+                if self.__counting:
+                    self.__win_checks += moves.index(col) + 1
+                return self.__sure_win - (disks + 1)
+        if self.__counting:
+            self.__win_checks += len(moves)
+        if depth <= 1:
+            if self.__counting:
+                self.__leaf_evals += 1
+            return self.__evaluator.get_score(player)
+
+        # a position and its mirror image share their entry. the move of the
+        # entry is in the columns of the position that has the smaller key.
+        key, mirrored = board.get_canonical_key(player)
+        entry = self.__table.get(key)
+        if entry is not None:
+            if entry[1] >= depth:
+                flag, score = entry[2], entry[3]
+                if flag == EXACT:
+                    return score
+                if flag == LOWER_BOUND and score > alpha:
+                    alpha = score
+                elif flag == UPPER_BOUND and score < beta:
+                    beta = score
+                if alpha >= beta:
+                    return score
+            moves = self.__get_poss_moves(
+                board, self.__mirror_col(entry[4], mirrored))
+
+        orig_alpha = alpha
+        opponent = PLAYER_A + PLAYER_B - player
+        best = -self.__sure_win
+        best_col = None
+        for col in moves:
+            row = self.__try_to_move(board, col, player)[0]
+            self.__evaluator.make_move(row, col, player)
+            try:
+                score = -self.__negamax(board, depth - 1, -beta, -alpha,
+                                        opponent, disks + 1)
+            finally:
+                board.undo_move(col)
+                self.__evaluator.undo_move(row, col, player)
+            if score > best:
+                best = score
+                best_col = col
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if self.__counting:
+                            self.__cutoffs += 1
                         break
-                    else:
-                        self.__last_move = max(self.__moves_rating,
-                                               key=lambda i:
-                                               self.__moves_rating[i])
-                        # another turn - recursively
-                        self.__update_moves_rating(curr_board2, rounds - 1)
 
-    def __get_poss_moves(self, board):
+        if best <= orig_alpha:
+            flag = UPPER_BOUND
+        elif best >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.__table.store(key, depth, flag, best,
+                           self.__mirror_col(best_col, mirrored))
+        return best
+
+    def __principal_variation(self, first_col, depth):
         """
-        private method that returns a list of possible moves in a given game.
+        private method that follows the best moves that the transposition
+        table remembers, from the AI's board.
+        :param first_col: the best move of the AI
+        :param depth: maximal number of moves
+        :return: list of columns
+        """
+        board = self.__board.copy()
+        player = self.__player
+        variation = []
+        col = first_col
+        while col is not None and len(variation) < depth:
+            if not self.__try_to_move(board, col, player):
+                break
+            variation.append(col)
+            if self.__has_win(board.get_player_bits(player), self.__col_bits):
+                break
+            player = PLAYER_A + PLAYER_B - player
+            key, mirrored = board.get_canonical_key(player)
+            entry = self.__table.get(key)
+            col = None
+            if entry is not None:
+                col = self.__mirror_col(entry[4], mirrored)
+        return variation
+
+    def __call_hooks(self, event, stats):
+        """
+        calls the functions that were added with add_hook.
+        """
+        for hook in self.__hooks:
+            hook(event, stats)
+
+    def __get_poss_moves(self, board, first_col=None):
+        """
+        private method that returns a list of possible moves in a given game,
+        the central columns first.
         :param board: given game board
+        :param first_col: move to search first, such as the best move of the
+        transposition table entry of the board.
         :return:possible moves list
         """
-        poss_moves = [j for j in range(BOARD_COL) if
-                      board.get_col_dict()[j] < BOARD_ROW]
+        poss_moves = [j for j in self.__move_order if
+                      board.get_col_height(j) < self.__rows]
+        if first_col is not None and first_col in poss_moves:
+            poss_moves.remove(first_col)
+            poss_moves.insert(0, first_col)
 
         return poss_moves
 
-    def __init_moves_rating(self, board):
+    def __mirror_col(self, col, mirrored):
         """
-        method that initializes moves rating dictionary.
-        :return:None
+        converts a column between a position and its mirror image.
+        :param col: column number, or None
+        :param mirrored: whether to mirror the column
+        :return: column number, or None
         """
-        self.__moves_rating = dict(
-            (i, 0) for i in self.__get_poss_moves(board))
+        if mirrored and col is not None:
+            return self.__cols - 1 - col
+        return col
+
+
+def get_sure_win(row, col, win_length=WIN_SEQUENCE):
+    """
+    :param row: amount of rows
+    :param col: amount of columns
+    :param win_length: length of a winning sequence
+    :return: the score of a win before the disks of the game are taken off
+    it - SURE_WIN, or more on boards that the evaluator rates higher, so
+    that even a win on a full board scores above the rating of any board.
+    """
+    return max(SURE_WIN, max_score(row, col, win_length) + row * col + 1)
@@ -0,0 +1,194 @@
+"""
+vectorized evaluation of many positions at once, with NumPy. the rules and
+the ratings are the same as of WinDetector, Game and ThreatEvaluator:
+
+    cells = numpy.zeros((n, ROW_SIZE, COL_SIZE), dtype=numpy.int8)
+    status, legal, scores = batch.evaluate(cells)
+
+positions are given either as cells - an N x rows x cols array of 0 (empty),
+1 (player A) and 2 (player B), row 0 at the top like the Board - or packed,
+as an N x 2 uint64 array of the BitBoard bits of player A and player B, so
+the board must fit in 64 bits - (rows + 1) * cols <= 64.
+"""
+from .evaluator import TWO_SCORE, THREE_SCORE, THREAT_SCORE
+from .game import ROW_SIZE, COL_SIZE, TIE_RESULT, PLAYER_A, PLAYER_B
+from .win_detector import WIN_SEQUENCE
+import numpy as np
+
+# status of a position that is not over.
+NO_RESULT = -1
+
+
+def evaluate(positions, row=ROW_SIZE, col=COL_SIZE, win_length=WIN_SEQUENCE):
+    """
+    evaluates a batch of positions.
+    :param positions: N x rows x cols cells array, or N x 2 packed array
+    :param row: amount of rows
+    :param col: amount of columns
+    :param win_length: length of a winning sequence
+    :return: tuple of - N array of the status of every position (the winner,
+    TIE_RESULT or NO_RESULT), N x cols bool array of the legal moves, and N
+    array of the ratings of the positions for player A.
+    """
+    positions = np.asarray(positions)
+    if positions.ndim == 3:
+        cells = positions
+        row, col = cells.shape[1:]
+        packed = pack(cells)
+    else:
+        packed = positions
+        cells = unpack(packed, row, col)
+    status = get_status(packed, row, col, win_length)
+    legal = get_legal_moves(packed, row, col)
+    legal[status != NO_RESULT] = False
+    return status, legal, get_scores(cells, win_length)
+
+
+def pack(cells):
+    """
+    :param cells: N x rows x cols cells array
+    :return: N x 2 packed array
+    """
+    cells = np.asarray(cells)
+    n, row, col = cells.shape
+    bits = _bit_indexes(row, col)
+    flat = cells.reshape(n, row * col)
+    packed = np.zeros((n, 2), dtype=np.uint64)
+    for idx, player in enumerate((PLAYER_A, PLAYER_B)):
+        weights = np.left_shift(np.uint64(1), bits)
+        packed[:, idx] = np.bitwise_or.reduce(
+            np.where(flat == player, weights, np.uint64(0)), axis=1)
+    return packed
+
+
+def unpack(packed, row=ROW_SIZE, col=COL_SIZE):
+    """
+    :param packed: N x 2 packed array
+    :return: N x rows x cols cells array
+    """
+    packed = np.asarray(packed, dtype=np.uint64)
+    bits = _bit_indexes(row, col)
+    cells = np.zeros((len(packed), row * col), dtype=np.int8)
+    for idx, player in enumerate((PLAYER_A, PLAYER_B)):
+        has_disk = (packed[:, idx, None] >> bits) & np.uint64(1)
+        cells[has_disk.astype(bool)] = player
+    return cells.reshape(len(packed), row, col)
+
+
+def get_status(packed, row=ROW_SIZE, col=COL_SIZE, win_length=WIN_SEQUENCE):
+    """
+    :param packed: N x 2 packed array
+    :return: N array of the winner of every position, TIE_RESULT if the
+    board is full, and NO_RESULT otherwise.
+    """
+    packed = np.asarray(packed, dtype=np.uint64)
+    status = np.full(len(packed), NO_RESULT, dtype=np.int8)
+    mask = packed[:, 0] | packed[:, 1]
+    status[mask == _full_mask(row, col)] = TIE_RESULT
+    for idx, player in enumerate((PLAYER_A, PLAYER_B)):
+        status[_has_sequence(packed[:, idx], row, win_length)] = player
+    return status
+
+
+def get_legal_moves(packed, row=ROW_SIZE, col=COL_SIZE):
+    """
+    :param packed: N x 2 packed array
+    :return: N x cols bool array - True for the columns that are not full
+    """
+    _check_size(row, col)
+    packed = np.asarray(packed, dtype=np.uint64)
+    mask = packed[:, 0] | packed[:, 1]
+    top_bits = np.array([c * (row + 1) + row - 1 for c in range(col)],
+                        dtype=np.uint64)
+    return ((mask[:, None] >> top_bits) & np.uint64(1)) == 0
+
+
+def get_scores(cells, win_length=WIN_SEQUENCE):
+    """
+    rates the positions like ThreatEvaluator.
+    :param cells: N x rows x cols cells array
+    :return: N array of the ratings for player A
+    """
+    cells = np.asarray(cells)
+    n, row, col = cells.shape
+    windows, window_rows = _windows(row, col, win_length)
+    flat = cells.reshape(n, row * col)[:, windows]  # N x windows x length
+    a_count = (flat == PLAYER_A).sum(axis=2)
+    b_count = (flat == PLAYER_B).sum(axis=2)
+    # row of the first empty cell of every window, counted from the bottom
+    empty_row = row - window_rows[np.arange(len(windows)),
+                                  (flat == 0).argmax(axis=2)]
+    odd_empty = empty_row % 2 == 1
+    length = win_length
+    scores = np.zeros(n, dtype=np.int64)
+    for count, other, sign, threat_rows in ((a_count, b_count, 1, odd_empty),
+                                            (b_count, a_count, -1,
+                                             ~odd_empty)):
+        open_window = (other == 0)
+        twos = open_window & (count == length - 2)
+        threes = open_window & (count == length - 1)
+        value = (twos * TWO_SCORE + threes * THREE_SCORE +
+                 (threes & threat_rows) * THREAT_SCORE)
+        scores += sign * value.sum(axis=1)
+    return scores
+
+
+def _has_sequence(bits, row, length):
+    """
+    :param bits: N array of packed disks of one player
+    :return: N bool array - True where the disks contain a winning sequence
+    """
+    col_bits = row + 1
+    found = np.zeros(len(bits), dtype=bool)
+    for shift in (1, col_bits, col_bits + 1, col_bits - 1):
+        seq = bits
+        for i in range(1, length):
+            seq = seq & (bits >> np.uint64(i * shift))
+        found |= seq != 0
+    return found
+
+
+def _bit_indexes(row, col):
+    """
+    :return: array of the bit index of every cell, by row and column
+    """
+    _check_size(row, col)
+    return np.array([c * (row + 1) + (row - 1 - r) for r in range(row)
+                     for c in range(col)], dtype=np.uint64)
+
+
+def _full_mask(row, col):
+    """
+    :return: the packed mask of a full board
+    """
+    _check_size(row, col)
+    mask = 0
+    for c in range(col):
+        mask |= ((1 << row) - 1) << (c * (row + 1))
+    return np.uint64(mask)
+
+
+def _check_size(row, col):
+    """
+    raises ValueError if the packed board does not fit in 64 bits.
+    """
+    if (row + 1) * col > 64:
+        raise ValueError("The board does not fit in 64 bits.")
+
+
+def _windows(row, col, length):
+    """
+    :return: tuple of a windows x length array of the flat cell indexes of
+    every window, and an array of the same shape of the rows of the cells.
+    """
+    windows = []
+    for r in range(row):
+        for c in range(col):
+            for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row = r + d_row * (length - 1)
+                end_col = c + d_col * (length - 1)
+                if 0 <= end_row < row and 0 <= end_col < col:
+                    windows.append([(r + d_row * i) * col + c + d_col * i
+                                    for i in range(length)])
+    windows = np.array(windows)
+    return windows, windows // col
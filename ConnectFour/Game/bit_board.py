@@ -0,0 +1,228 @@
+PLAYER_A = 1
+PLAYER_B = 2
+
+
+class BitBoard:
+    """
+    class that defines bitboard objects. a bitboard holds the same state as a
+    Board object, but packs every player's disks into a single integer, so
+    moves and copies cost only a few integer operations.
+    the bits are ordered column by column from the bottom, each column
+    followed by one empty 'sentinel' bit:
+
+        5 12 19 26 33 40 47
+        4 11 18 25 32 39 46
+        3 10 17 24 31 38 45
+        2  9 16 23 30 37 44
+        1  8 15 22 29 36 43
+        0  7 14 21 28 35 42
+    """
+    __slots__ = ("__rows", "__cols", "__col_bits", "__player_bits",
+                 "__mirror_bits", "__heights")
+
+    def __init__(self, row, col):
+        """
+        constructor of bitboard object.
+        :param row: amount of rows
+        :param col: amount of columns
+        """
+        self.__rows = row
+        self.__cols = col
+        # bits per column - one more than the rows, for the sentinel bit.
+        self.__col_bits = row + 1
+        # disks of each player, indexed by the player's name (1 or 2),
+        # index 0 is unused.
+        self.__player_bits = [0, 0, 0]
+        # disks of each player in the left-right mirror image of the board,
+        # kept with every move so the mirror key costs no more than the key.
+        self.__mirror_bits = [0, 0, 0]
+        # Index = col num, Value = number of disks in the col.
+        self.__heights = [0] * col
+
+    # public methods
+    def make_move(self, row, col, name):
+        """
+        method of bitboard that makes moves in the board. the move must be
+        the lowest empty cell of its column.
+        :param row: row coordinate
+        :param col: col coordinate
+        :param name: of player that made the move
+        :return: True if could make the move, False if not
+        """
+        if self.__is_valid_move(row, col):
+            self.__player_bits[name] |= 1 << self.__bit_index(row, col)
+            self.__mirror_bits[name] |= 1 << self.__bit_index(
+                row, self.__cols - 1 - col)
+            self.__heights[col] += 1
+            return True
+        return False
+
+    def undo_move(self, col):
+        """
+        method that takes back the last move that was made in the given
+        column.
+        :param col: col coordinate
+        :return: True if could take back a move, False if the col is empty
+        """
+        if not 0 <= col < self.__cols or not self.__heights[col]:
+            return False
+        self.__heights[col] -= 1
+        bit = 1 << (col * self.__col_bits + self.__heights[col])
+        mirror_bit = 1 << ((self.__cols - 1 - col) * self.__col_bits +
+                           self.__heights[col])
+        name = PLAYER_A if self.__player_bits[PLAYER_A] & bit else PLAYER_B
+        self.__player_bits[name] ^= bit
+        self.__mirror_bits[name] ^= mirror_bit
+        return True
+
+    def get_cell_content(self, row, col):
+        """
+        method that returns the content of given cell. if the cell is not in
+        the board, raises exception.
+        :param row: coordinate
+        :param col: coordinate
+        :return: content of the cell - None if empty or the number of the
+        player.
+        """
+        if not self.__cell_in_board(row, col):
+            raise ValueError("Illegal location.")
+        bit = 1 << self.__bit_index(row, col)
+        if self.__player_bits[PLAYER_A] & bit:
+            return PLAYER_A
+        if self.__player_bits[PLAYER_B] & bit:
+            return PLAYER_B
+
+    def get_col_dict(self):
+        return dict(enumerate(self.__heights))
+
+    def get_col_height(self, col):
+        """
+        method that returns the number of disks in the given column.
+        :param col: column number
+        :return: number of disks
+        """
+        return self.__heights[col]
+
+    def get_player_bits(self, name):
+        """
+        method that returns the packed disks of the given player.
+        :param name: player name (1 or 2)
+        :return: int, one bit per disk
+        """
+        return self.__player_bits[name]
+
+    def get_mask(self):
+        """
+        method that returns the packed disks of both players.
+        :return: int, one bit per occupied cell
+        """
+        return self.__player_bits[PLAYER_A] | self.__player_bits[PLAYER_B]
+
+    def get_key(self, name):
+        """
+        method that returns a unique key of the position, for the given
+        player. adding the mask to the player's disks moves a bit above the
+        top disk of every column, so no two positions share a key.
+        :param name: player name (1 or 2)
+        :return: int
+        """
+        return self.__player_bits[name] + self.get_mask()
+
+    def get_mirror_key(self, name):
+        """
+        method that returns the key (see get_key) of the left-right mirror
+        image of the position.
+        :param name: player name (1 or 2)
+        :return: int
+        """
+        return self.__mirror_bits[name] + (self.__mirror_bits[PLAYER_A] |
+                                           self.__mirror_bits[PLAYER_B])
+
+    def get_canonical_key(self, name):
+        """
+        method that returns the key that is the same for the position and
+        its mirror image - the smaller of the two keys.
+        :param name: player name (1 or 2)
+        :return: tuple of the key and True if it is the key of the mirror
+        image. moves that are stored with a mirrored key are in mirrored
+        columns.
+        """
+        key = self.get_key(name)
+        mirror_key = self.get_mirror_key(name)
+        if mirror_key < key:
+            return mirror_key, True
+        return key, False
+
+    def is_symmetric(self):
+        """
+        method that checks if the position is the same as its mirror image.
+        mirrored moves of a symmetric position lead to mirrored positions.
+        :return: bool value
+        """
+        return self.__mirror_bits == self.__player_bits
+
+    def get_size(self):
+        """
+        :return: tuple of (rows, columns)
+        """
+        return self.__rows, self.__cols
+
+    def copy(self):
+        """
+        method that returns an independent copy of the bitboard.
+        :return: bitboard object
+        """
+        new_board = BitBoard(self.__rows, self.__cols)
+        new_board.__player_bits = self.__player_bits[:]
+        new_board.__mirror_bits = self.__mirror_bits[:]
+        new_board.__heights = self.__heights[:]
+        return new_board
+
+    def snapshot(self):
+        """
+        method that returns the state of the bitboard, to restore later.
+        :return: tuple of the disks of both players, the column heights and
+        the disks of the mirror image
+        """
+        return (self.__player_bits[PLAYER_A], self.__player_bits[PLAYER_B],
+                tuple(self.__heights), self.__mirror_bits[PLAYER_A],
+                self.__mirror_bits[PLAYER_B])
+
+    def restore(self, snapshot):
+        """
+        method that sets the bitboard to a state returned by snapshot.
+        """
+        bits_a, bits_b, heights, mirror_a, mirror_b = snapshot
+        self.__player_bits = [0, bits_a, bits_b]
+        self.__mirror_bits = [0, mirror_a, mirror_b]
+        self.__heights = list(heights)
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    # private methods
+    def __bit_index(self, row, col):
+        """
+        converts board coordinates (row 0 is the top row) to a bit index.
+        :return: int
+        """
+        return col * self.__col_bits + (self.__rows - 1 - row)
+
+    def __cell_in_board(self, row, col):
+        """
+        checks if a given cell is in the board.
+        :return: bool value
+        """
+        return 0 <= row < self.__rows and 0 <= col < self.__cols
+
+    def __is_valid_move(self, row, col):
+        """
+        checks if a given move is valid - the given cell is the lowest empty
+        cell in its column.
+        :return: bool value
+        """
+        return (self.__cell_in_board(row, col) and
+                row == self.__rows - 1 - self.__heights[col])
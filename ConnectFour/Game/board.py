@@ -1,5 +1,3 @@
-import copy
-
 EMPTY_CELL = 0
 
 
@@ -7,6 +5,7 @@ class Board:
     """
     class that defines board objects.
     """
+    __slots__ = ("__board", "__col_dict")
 
     def __init__(self, row, col):
         """
@@ -34,6 +33,20 @@ class Board:
             return True
         return False
 
+    def undo_move(self, col):
+        """
+        method that takes back the last move that was made in the given
+        column.
+        :param col: col coordinate
+        :return: True if could take back a move, False if the col is empty
+        """
+        if not self.__col_dict.get(col):
+            return False
+        row = len(self.__board) - self.__col_dict[col]
+        self.__board[row][col] = EMPTY_CELL
+        self.__col_dict[col] -= 1
+        return True
+
     def get_cell_content(self, row, col):
         """
         method that returns the content of given cell. if the cell is not in
@@ -49,7 +62,13 @@ class Board:
             return self.__board[row][col]
 
     def get_col_dict(self):
-        return copy.deepcopy(self.__col_dict)
+        return dict(self.__col_dict)
+
+    def get_size(self):
+        """
+        :return: tuple of (rows, columns)
+        """
+        return len(self.__board), len(self.__col_dict)
 
     # private methods
     def __create_board(self, row, col):
@@ -0,0 +1,168 @@
+from .win_detector import WIN_SEQUENCE
+
+PLAYER_A = 1
+PLAYER_B = 2
+TWO_SCORE = 2
+THREE_SCORE = 5
+# bonus of an open three whose empty cell is on a row that favors its
+# player - odd rows (counting from 1 at the bottom) for the first player,
+# even rows for the second.
+THREAT_SCORE = 4
+
+
+class ThreatEvaluator:
+    """
+    class that defines evaluator objects, that rate a board by its open
+    windows - sequences of WIN_SEQUENCE cells that only one player has disks
+    in. the rating is kept up to date as moves are made and taken back, by
+    updating only the windows of the changed cell.
+    """
+
+    def __init__(self, row, col, win_length=WIN_SEQUENCE):
+        """
+        constructor of evaluator object, for an empty board.
+        :param row: amount of rows
+        :param col: amount of columns
+        :param win_length: length of a winning sequence
+        """
+        self.__rows = row
+        self.__cols = col
+        self.__win_length = win_length
+        windows = self.__find_windows()
+        # the state of a window has a bit for each of its cells that player
+        # A has a disk in, and above them a bit for each cell of player B.
+        self.__states = [0] * len(windows)
+        self.__score = 0
+        # rating of every state of a window, by window. windows that have
+        # their cells on the same rows share the ratings.
+        tables = {}
+        self.__values = []
+        # Index = player, cell - (window, state addition) of every window of
+        # the cell.
+        self.__updates = [None, [[] for i in range(row * col)],
+                          [[] for i in range(row * col)]]
+        for idx, cells in enumerate(windows):
+            rows = tuple(cell[0] for cell in cells)
+            if rows not in tables:
+                tables[rows] = self.__rate_states(rows)
+            self.__values.append(tables[rows])
+            for pos, (cell_row, cell_col) in enumerate(cells):
+                cell = cell_row * col + cell_col
+                self.__updates[PLAYER_A][cell].append((idx, 1 << pos))
+                self.__updates[PLAYER_B][cell].append(
+                    (idx, 1 << (pos + win_length)))
+
+    # public methods
+    def make_move(self, row, col, player):
+        """
+        method that updates the rating with a disk of the given player in
+        the given cell.
+        """
+        states = self.__states
+        values = self.__values
+        delta = 0
+        for idx, add in self.__updates[player][row * self.__cols + col]:
+            state = states[idx]
+            states[idx] = state + add
+            delta += values[idx][state + add] - values[idx][state]
+        self.__score += delta
+
+    def undo_move(self, row, col, player):
+        """
+        method that updates the rating when the disk of the given player is
+        taken back from the given cell.
+        """
+        states = self.__states
+        values = self.__values
+        delta = 0
+        for idx, add in self.__updates[player][row * self.__cols + col]:
+            state = states[idx]
+            states[idx] = state - add
+            delta += values[idx][state - add] - values[idx][state]
+        self.__score += delta
+
+    def set_board(self, board):
+        """
+        method that rates the given board from scratch.
+        :param board: board object
+        """
+        self.__states = [0] * len(self.__states)
+        self.__score = 0
+        for row in range(self.__rows):
+            for col in range(self.__cols):
+                player = board.get_cell_content(row, col)
+                if player:
+                    self.make_move(row, col, player)
+
+    def get_score(self, player):
+        """
+        :param player: player number
+        :return: the rating of the board - positive if the given player is
+        better.
+        """
+        if player == PLAYER_A:
+            return self.__score
+        return -self.__score
+
+    # private methods
+    def __find_windows(self):
+        """
+        :return: list of the windows of the board, each a list of (row, col)
+        cells.
+        """
+        windows = []
+        length = self.__win_length
+        for row in range(self.__rows):
+            for col in range(self.__cols):
+                # right, down, down-right and down-left
+                for d_row, d_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_row = row + d_row * (length - 1)
+                    end_col = col + d_col * (length - 1)
+                    if 0 <= end_row < self.__rows and \
+                            0 <= end_col < self.__cols:
+                        windows.append([(row + d_row * i, col + d_col * i)
+                                        for i in range(length)])
+        return windows
+
+    def __rate_states(self, rows):
+        """
+        rates every state of a window with cells in the given rows.
+        :param rows: row of every cell of the window
+        :return: list of ratings, by state
+        """
+        length = self.__win_length
+        full = (1 << length) - 1
+        values = [0] * (1 << (2 * length))
+        for a_bits in range(1 << length):
+            for b_bits in range(1 << length):
+                if a_bits and b_bits:  # no one can win in this window
+                    continue
+                bits, sign = (a_bits, 1) if a_bits else (b_bits, -1)
+                count = bin(bits).count("1")
+                value = 0
+                if count == length - 2:
+                    value = TWO_SCORE
+                elif count == length - 1:
+                    value = THREE_SCORE
+                    empty = (full ^ bits).bit_length() - 1
+                    # rows counted from 1 at the bottom
+                    odd_row = (self.__rows - rows[empty]) % 2 == 1
+                    if odd_row == (sign == 1):
+                        value += THREAT_SCORE
+                values[a_bits | (b_bits << length)] = sign * value
+        return values
+
+
+def max_score(row, col, win_length=WIN_SEQUENCE):
+    """
+    :param row: amount of rows
+    :param col: amount of columns
+    :param win_length: length of a winning sequence
+    :return: bound of the rating of any board of the given size - every
+    window adds at most an open three on a row that favors its player.
+    """
+    rows = max(0, row - win_length + 1)
+    cols = max(0, col - win_length + 1)
+    # right, down, and the two diagonals
+    windows = row * cols + rows * col + 2 * rows * cols
+    return windows * max(TWO_SCORE, THREE_SCORE + THREAT_SCORE)
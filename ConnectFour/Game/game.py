@@ -1,12 +1,12 @@
-from .board import Board
-from .win_detector import WinDetector
+from .bit_board import BitBoard
+from .win_detector import WinDetector, WIN_SEQUENCE
 
 COL_SIZE = 7
 ROW_SIZE = 6
 TIE_RESULT = 0
-WIN_SEQUENCE = 4
 PLAYER_A = 1
 PLAYER_B = 2
+NO_MOVE = (PLAYER_A, -1, -1)
 
 
 class Game:
@@ -14,19 +14,31 @@ class Game:
     class that defines game objects. these objects are responsible to run the
     'background' of the game.
     """
+    __slots__ = ("__rows", "__cols", "__win_length", "__board", "__player_a",
+                 "__player_b", "__round_counter", "__win_detector",
+                 "__last_move", "__moves", "__game_over")
 
-    def __init__(self):
+    def __init__(self, row=ROW_SIZE, col=COL_SIZE, win_length=WIN_SEQUENCE):
         """
         constructor of this class.
-        """
-        self.__board = Board(ROW_SIZE, COL_SIZE)
+        :param row: amount of rows
+        :param col: amount of columns
+        :param win_length: number of disks in a row that win the game
+        """
+        self.__rows = row
+        self.__cols = col
+        self.__win_length = win_length
+        self.__board = BitBoard(row, col)
         self.__player_a = PLAYER_A
         self.__player_b = PLAYER_B
         self.__round_counter = 1
-        self.__win_detector = WinDetector(self.__board)
+        self.__win_detector = WinDetector(self.__board, win_length)
         # initial values
-        self.__last_move = (PLAYER_A, -1, -1)
-        self.__win_seq = []
+        self.__last_move = NO_MOVE
+        # the columns of the moves that were made, as a linked list of
+        # (column, previous moves) pairs. the list is never changed, so
+        # snapshots can share it.
+        self.__moves = None
         self.__game_over = False
 
     # public methods
@@ -38,14 +50,36 @@ class Game:
         :return: True if could make the move. else - raises exception.
         """
         if (not self.__game_over) and self.__legal_move(column):
-            row = (ROW_SIZE - 1) - self.__board.get_col_dict()[column]
+            row = (self.__rows - 1) - self.__board.get_col_height(column)
             player_name = self.get_current_player()
             if self.__board.make_move(row, column, player_name):
                 self.__round_counter += 1
                 self.__last_move = (player_name, row, column)
+                self.__moves = (column, self.__moves)
                 return True
         raise ValueError("Illegal move")
 
+    def undo_move(self):
+        """
+        method that takes back the last move of the game.
+        :return: the column of the move. if no move was made - raises
+        exception.
+        """
+        if self.__moves is None:
+            raise ValueError("No move to undo")
+        column = self.__moves[0]
+        self.__moves = self.__moves[1]
+        self.__board.undo_move(column)
+        self.__round_counter -= 1
+        self.__last_move = NO_MOVE
+        if self.__moves is not None:
+            last_col = self.__moves[0]
+            row = self.__rows - self.__board.get_col_height(last_col)
+            self.__last_move = (self.__board.get_cell_content(row, last_col),
+                                row, last_col)
+        self.__game_over = False
+        return column
+
     def get_winner(self):
         """
         method that returns the winner of the game, if there is one.
@@ -92,6 +126,19 @@ class Game:
         col = self.__last_move[2]
         return row, col
 
+    def get_moves(self):
+        """
+        method that returns the moves that were made in the game.
+        :return: list of columns, by the order of the moves.
+        """
+        columns = []
+        moves = self.__moves
+        while moves is not None:
+            columns.append(moves[0])
+            moves = moves[1]
+        columns.reverse()
+        return columns
+
     def get_win_seq(self):
         """
         method that returns the winning disk's coordinates.
@@ -99,21 +146,55 @@ class Game:
         if the winning sequence doesn't includes enough cells.
         """
         seq = self.__win_detector.get_win_seq()
-        if len(seq) >= WIN_SEQUENCE:
-            return seq[:4]
+        if len(seq) >= self.__win_length:
+            return seq[:self.__win_length]
         return []
 
+    def snapshot(self):
+        """
+        method that returns the state of the game, to restore later. takes
+        the same time for any number of moves.
+        :return: tuple
+        """
+        return (self.__board.snapshot(), self.__round_counter,
+                self.__last_move, self.__moves, self.__game_over)
+
+    def restore(self, snapshot):
+        """
+        method that sets the game to a state returned by snapshot.
+        """
+        board, self.__round_counter, self.__last_move, self.__moves, \
+            self.__game_over = snapshot
+        self.__board.restore(board)
+
+    def get_board(self):
+        """
+        method that returns a copy of the game board.
+        :return: bitboard object
+        """
+        return self.__board.copy()
+
     def get_column_dict(self):
         return self.__board.get_col_dict()
 
+    def get_size(self):
+        """
+        :return: tuple of (rows, columns)
+        """
+        return self.__rows, self.__cols
+
+    def get_win_length(self):
+        """ Getter """
+        return self.__win_length
+
     # private methods
     def __is_tie(self):
         """
         private method that checks if there is a tie.
         :return: bool value
         """
-        for col, counter in self.__board.get_col_dict().items():
-            if counter != ROW_SIZE:
+        for col in range(self.__cols):
+            if self.__board.get_col_height(col) != self.__rows:
                 return False
         return True
 
@@ -123,5 +204,5 @@ class Game:
         :param col: move
         :return: bool value
         """
-        col_dict = self.__board.get_col_dict()
-        return col in col_dict and col_dict[col] < ROW_SIZE
+        return (col in range(self.__cols) and
+                self.__board.get_col_height(col) < self.__rows)
@@ -0,0 +1,171 @@
+from .ai_player import AI
+from .game import Game, ROW_SIZE, COL_SIZE
+from .transposition_table import TranspositionTable
+import argparse
+import hashlib
+import mmap
+import struct
+
+MAGIC = b"C4BK"
+# magic, rows, columns, number of records
+HEADER = struct.Struct("<4sBBI")
+# canonical key, best move
+RECORD = struct.Struct("<QB")
+DEFAULT_PLIES = 4
+DEFAULT_DEPTH = 12
+
+
+class OpeningBook:
+    """
+    class that defines opening book objects. a book is a file of best moves
+    for early positions, sorted by the canonical key of the position. the
+    file is memory-mapped and searched in place, so opening it takes the
+    same time for any book size, and processes that open the same book
+    share its memory.
+    """
+
+    def __init__(self, path):
+        """
+        constructor of the opening book. opens the given book file.
+        :param path: path of a file written by build_book
+        """
+        self.__file = open(path, "rb")
+        try:
+            self.__map = mmap.mmap(self.__file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file can not be mapped
+            self.__file.close()
+            raise ValueError("Illegal opening book file.")
+        magic, self.__rows, self.__cols, self.__size = HEADER.unpack_from(
+            self.__map, 0)
+        if (magic != MAGIC or len(self.__map) !=
+                HEADER.size + self.__size * RECORD.size):
+            self.close()
+            raise ValueError("Illegal opening book file.")
+        self.__digest = None
+
+    # public methods
+    def get_move(self, board, player):
+        """
+        method that returns the book move of the given position.
+        :param board: bitboard object
+        :param player: the player that its his turn
+        :return: column, None if the position is not in the book.
+        """
+        if board.get_size() != (self.__rows, self.__cols):
+            return
+        key, mirrored = board.get_canonical_key(player)
+        move = self.__find(key)
+        if move is not None and mirrored:
+            move = self.__cols - 1 - move
+        return move
+
+    def get_digest(self):
+        """
+        method that returns a digest of the book file, that tells apart
+        books with other moves (e.g. in the keys of the result cache). it is
+        computed on the first call, so opening the book stays fast.
+        :return: hex string
+        """
+        if self.__digest is None:
+            self.__digest = hashlib.sha1(self.__map).hexdigest()
+        return self.__digest
+
+    def get_size(self):
+        """
+        :return: number of positions in the book
+        """
+        return self.__size
+
+    def close(self):
+        """
+        method that closes the book file.
+        """
+        self.__map.close()
+        self.__file.close()
+
+    def __len__(self):
+        return self.__size
+
+    # private methods
+    def __find(self, key):
+        """
+        binary search of the given key in the book records.
+        :return: the move of the key, None if it is not in the book.
+        """
+        low, high = 0, self.__size
+        while low < high:
+            mid = (low + high) // 2
+            mid_key, move = RECORD.unpack_from(
+                self.__map, HEADER.size + mid * RECORD.size)
+            if mid_key == key:
+                return move
+            if mid_key < key:
+                low = mid + 1
+            else:
+                high = mid
+
+
+def build_book(path, plies=DEFAULT_PLIES, depth=DEFAULT_DEPTH):
+    """
+    searches the best move of every position that can be reached in up to
+    the given number of moves, and writes them to a book file.
+    :param path: path of the book file to write
+    :param plies: number of moves of the deepest positions in the book
+    :param depth: search depth of every position
+    :return: number of positions in the book
+    """
+    table = TranspositionTable()
+    moves = {}
+    _add_positions(Game(), plies, depth, table, moves)
+    with open(path, "wb") as book_file:
+        book_file.write(HEADER.pack(MAGIC, ROW_SIZE, COL_SIZE, len(moves)))
+        for key in sorted(moves):
+            book_file.write(RECORD.pack(key, moves[key]))
+    return len(moves)
+
+
+def _add_positions(game, plies, depth, table, moves):
+    """
+    adds the given game position and the positions that follow it to the
+    book moves.
+    :param game: game object, left as it was
+    :param plies: number of moves to go deeper
+    :param depth: search depth of every position
+    :param table: transposition table shared by all the searches
+    :param moves: dict of canonical key to best move
+    """
+    if game.get_winner() is not None:
+        return
+    player = game.get_current_player()
+    key, mirrored = game.get_board().get_canonical_key(player)
+    if key in moves:
+        return
+    move = AI(game, player, depth, table).find_legal_move()
+    if mirrored:
+        move = COL_SIZE - 1 - move
+    moves[key] = move
+    if not plies:
+        return
+    for col in range(COL_SIZE):
+        if game.get_column_dict()[col] < ROW_SIZE:
+            game.make_move(col)
+            _add_positions(game, plies - 1, depth, table, moves)
+            game.undo_move()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build a connect four opening book.")
+    parser.add_argument("path", help="book file to write")
+    parser.add_argument("--plies", type=int, default=DEFAULT_PLIES,
+                        help="number of moves of the deepest positions")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH,
+                        help="search depth of every position")
+    args = parser.parse_args()
+    size = build_book(args.path, args.plies, args.depth)
+    print("wrote %d positions to %s" % (size, args.path))
+
+
+if __name__ == '__main__':
+    main()
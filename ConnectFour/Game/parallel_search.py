@@ -0,0 +1,209 @@
+from .ai_player import AI, SearchTimeout, DEFAULT_DEPTH, get_sure_win
+from .game import Game, ROW_SIZE, COL_SIZE, WIN_SEQUENCE
+from .transposition_table import TranspositionTable
+import argparse
+import multiprocessing
+import random
+import time
+
+# process pools by number of workers, shared by all the AI objects.
+_pools = {}
+# state of a worker process, kept between its searches (see _init_worker):
+# the transposition table, the game that the moves are rated on, its board
+# size and win length, and the AI of every player of the game.
+_table = None
+_game = None
+_game_size = None
+_ais = {}
+
+
+def search(moves, player, max_depth, timeout, workers, seed=None,
+           row=ROW_SIZE, col=COL_SIZE, win_length=WIN_SEQUENCE):
+    """
+    searches the best move of the given position over a pool of processes,
+    with iterative deepening. at every depth, each possible move is rated in
+    its own process, and the depth counts only if all of them are rated
+    before the time is up. the first move (the best of the previous depth)
+    is rated before the others, so they are searched with its score as
+    alpha.
+    :param moves: the moves (columns) that were made in the game
+    :param player: the player that searches, must be the player that its
+    his turn
+    :param max_depth: the deepest depth to search
+    :param timeout: time limit in milliseconds, None for no limit
+    :param workers: number of processes
+    :param seed: seed for choosing between equally rated moves. if given,
+    every move is rated from an empty transposition table, so the result
+    does not depend on which worker rated which move before.
+    :param row: amount of rows of the game
+    :param col: amount of columns of the game
+    :param win_length: win length of the game
+    :return: tuple of the best move and the depth of the last completed
+    search
+    """
+    # the deadline is sent to the workers, so it is measured with the
+    # wall clock that all the processes share.
+    deadline = None
+    if timeout is not None:
+        deadline = time.time() + timeout / 1000
+    pool = get_pool(workers)
+    size = (row, col, win_length)
+    known_result = get_sure_win(row, col, win_length) - row * col
+    game = Game(*size)
+    for move in moves:
+        game.make_move(move)
+    heights = game.get_column_dict()
+    cols = sorted((c for c in range(col) if heights[c] < row),
+                  key=lambda c: abs(col // 2 - c))
+    if game.get_board().is_symmetric():
+        # mirrored moves have the same scores
+        cols = [c for c in cols if c <= col - 1 - c]
+    best_col = cols[0]
+    last_depth = 0
+    for depth in range(1, max_depth + 1):
+        if deadline is not None and time.time() >= deadline:
+            break
+        clear_table = seed is not None
+        first_score = pool.apply(_rate_move, ((
+            moves, player, cols[0], depth, deadline, clear_table, size,
+            None),))
+        if first_score is None:
+            break
+        # one below the first score, so the moves that score the same are
+        # rated exactly, and can be chosen between.
+        tasks = [(moves, player, c, depth, deadline, clear_table, size,
+                  first_score - 1) for c in cols[1:]]
+        scores = [first_score] + pool.map(_rate_move, tasks, 1)
+        if None in scores:
+            break
+        best_score = max(scores)
+        options = [c for c, score in zip(cols, scores)
+                   if score == best_score]
+        best_col = options[0]
+        if seed is not None:
+            best_col = random.Random(seed).choice(options)
+        last_depth = depth
+        if abs(best_score) >= known_result:
+            break
+        # the next depth starts from the best rated moves.
+        cols = [c for score, c in sorted(zip(scores, cols),
+                                           key=lambda pair: -pair[0])]
+    return best_col, last_depth
+
+
+def get_pool(workers):
+    """
+    returns the process pool of the given size, creates it on first use.
+    :param workers: number of processes
+    :return: multiprocessing pool
+    """
+    if workers not in _pools:
+        _pools[workers] = multiprocessing.Pool(workers,
+                                               initializer=_init_worker)
+    return _pools[workers]
+
+
+def _init_worker():
+    """
+    creates the transposition table of a worker process. the table, the
+    game and the AI objects are kept for all the moves that the worker
+    rates, instead of creating them for every move.
+    """
+    global _table
+    _table = TranspositionTable()
+
+
+def _rate_move(task):
+    """
+    rates one move of a position, in a worker process.
+    :param task: tuple of the game moves, the player, the rated move, the
+    depth, the deadline (wall clock time, None for no limit), whether to
+    start from an empty transposition table, the (rows, columns, win
+    length) of the game, and the alpha of the search (see AI.rate_move).
+    :return: score of the move, None if the time was up.
+    """
+    moves, player, col, depth, deadline, clear_table, size, alpha = task
+    timeout = None
+    if deadline is not None:
+        timeout = (deadline - time.time()) * 1000
+        if timeout <= 0:
+            return
+    if clear_table:
+        _table.clear()
+    ai = _get_ai(moves, player, size)
+    _table.new_search()
+    try:
+        return ai.rate_move(col, depth, timeout, alpha=alpha)
+    except SearchTimeout:
+        return
+
+
+def _get_ai(moves, player, size):
+    """
+    sets the game of the worker to the given moves - takes back its moves
+    that are not in the given ones, and makes the new moves.
+    :param size: tuple of the rows, columns and win length of the game
+    :return: the AI of the player, on the game of the worker
+    """
+    global _game, _game_size
+    if size != _game_size:
+        # the same keys are other positions on another board
+        _table.clear()
+        _game = Game(*size)
+        _game_size = size
+        _ais.clear()
+    played = _game.get_moves()
+    same = 0
+    while (same < len(moves) and same < len(played) and
+           moves[same] == played[same]):
+        same += 1
+    for _ in range(len(played) - same):
+        _game.undo_move()
+    for move in moves[same:]:
+        _game.make_move(move)
+    if player not in _ais:
+        _ais[player] = AI(_game, player, table=_table)
+    return _ais[player]
+
+
+def compare_speed(moves, depth, workers):
+    """
+    searches the given position with one process and with the given number
+    of processes, and prints the time of both.
+    :param moves: the moves (columns) that were made in the game
+    :param depth: search depth
+    :param workers: number of processes of the parallel search
+    :return: the speedup of the parallel search
+    """
+    get_pool(workers)  # the pool start up is not part of the search
+    times = []
+    for ai_workers in (1, workers):
+        game = Game()
+        for move in moves:
+            game.make_move(move)
+        ai = AI(game, game.get_current_player(), depth, workers=ai_workers)
+        start = time.perf_counter()
+        col = ai.find_legal_move()
+        times.append(time.perf_counter() - start)
+        print("%d workers: move %d, %.3f seconds" % (ai_workers, col,
+                                                      times[-1]))
+    speedup = times[0] / times[1]
+    print("speedup: %.2f" % speedup)
+    return speedup
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the serial and the parallel AI search.")
+    parser.add_argument("--moves", default="",
+                        help="moves of the position, e.g. 3342")
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH)
+    parser.add_argument("--workers", type=int,
+                        default=multiprocessing.cpu_count())
+    args = parser.parse_args()
+    compare_speed([int(move) for move in args.moves], args.depth,
+                  args.workers)
+
+
+if __name__ == '__main__':
+    main()
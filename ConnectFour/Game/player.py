@@ -3,6 +3,7 @@ class Player:
     class that defines players objects. each Game object has 2 players that has
     the following fields and methods.
     """
+    __slots__ = ("__name", "__type", "__color", "__score")
 
     def __init__(self, name, score, color="red", player_type=None):
         """
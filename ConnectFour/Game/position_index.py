@@ -0,0 +1,379 @@
+"""
+on-disk index of the positions of game records. every position is kept once
+under its canonical key (see BitBoard.get_canonical_key) with the number of
+games that reached it, their outcomes for the player that its his turn, and
+how often every column was played next. the records of the file are sorted
+by key and memory-mapped, so a lookup is a binary search:
+
+    build_index("positions.c4x", ["games.c4r"])
+    index = PositionIndex("positions.c4x")
+    stats = index.lookup(game.get_board(), game.get_current_player())
+
+the index is built by merging sorted runs, so the positions of any number of
+games are never all in memory, and new records are merged into an existing
+index with append=True. the board size of the index is the one of its
+record files. the keys of the index are 64 bits, so it is of games of four
+in a row on boards of up to 64 bits (see BitBoard).
+"""
+from .game import Game, ROW_SIZE, COL_SIZE, TIE_RESULT, PLAYER_A, PLAYER_B
+from .records import read_header, read_records
+from .win_detector import WIN_SEQUENCE
+import argparse
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+
+MAGIC = b"C4PX"
+# magic, rows, columns, number of records
+HEADER = struct.Struct("<4sBBQ")
+# positions in memory before they are written to a sorted run file.
+DEFAULT_CHUNK = 1000000
+RUN_BUFFER = 1 << 16
+
+
+def record_struct(col):
+    """
+    :param col: amount of columns
+    :return: struct of a record - the canonical key, the number of games,
+    wins, losses and draws, and the number of games that played every column
+    next. the counts are 64 bits, since the early positions are reached by
+    almost every game.
+    """
+    return struct.Struct("<Q4Q%dQ" % col)
+
+
+class PositionIndex:
+    """
+    class that defines position index objects, that answer queries on an
+    index file written by build_index.
+    """
+
+    def __init__(self, path):
+        """
+        constructor of position index object. opens the given index file.
+        :param path: path of the index file
+        """
+        self.__file = open(path, "rb")
+        try:
+            self.__map = mmap.mmap(self.__file.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        except ValueError:  # an empty file can not be mapped
+            self.__file.close()
+            raise ValueError("Illegal position index file.")
+        magic, self.__rows, self.__cols, self.__size = HEADER.unpack_from(
+            self.__map, 0)
+        self.__record = record_struct(self.__cols)
+        if (magic != MAGIC or len(self.__map) !=
+                HEADER.size + self.__size * self.__record.size):
+            self.close()
+            raise ValueError("Illegal position index file.")
+
+    # public methods
+    def lookup(self, board, player):
+        """
+        method that returns the statistics of the given position.
+        :param board: bitboard object
+        :param player: the player that its his turn
+        :return: dict of the statistics (see get_stats), None if the
+        position is not in the index.
+        """
+        if board.get_size() != (self.__rows, self.__cols):
+            return
+        key, mirrored = board.get_canonical_key(player)
+        record = self.lookup_key(key)
+        if record is not None:
+            return self.get_stats(record, mirrored)
+
+    def lookup_key(self, key):
+        """
+        :param key: canonical key
+        :return: the record of the key, None if it is not in the index.
+        """
+        idx = self.__lower_bound(key)
+        if idx < self.__size:
+            record = self.__read(idx)
+            if record[0] == key:
+                return record
+
+    def range(self, low, high):
+        """
+        generator of the records with low <= key < high, by key order.
+        """
+        idx = self.__lower_bound(low)
+        while idx < self.__size:
+            record = self.__read(idx)
+            if record[0] >= high:
+                return
+            yield record
+            idx += 1
+
+    def get_stats(self, record, mirrored=False):
+        """
+        :param record: record of the index
+        :param mirrored: True if the record is of the mirror image of the
+        position, so the columns of the moves are flipped.
+        :return: dict of the number of games, their wins, losses and draws
+        (for the player that its his turn), and list of the number of games
+        that played every column next.
+        """
+        moves = list(record[5:])
+        if mirrored:
+            moves.reverse()
+        return {"games": record[1], "wins": record[2],
+                "losses": record[3], "draws": record[4], "moves": moves}
+
+    def get_size(self):
+        """
+        :return: number of positions in the index
+        """
+        return self.__size
+
+    def get_board_size(self):
+        """
+        :return: tuple of the rows and columns of the indexed games
+        """
+        return self.__rows, self.__cols
+
+    def close(self):
+        """
+        method that closes the index file.
+        """
+        self.__map.close()
+        self.__file.close()
+
+    def __len__(self):
+        return self.__size
+
+    def __iter__(self):
+        """
+        iterates over all the records, by key order.
+        """
+        for idx in range(self.__size):
+            yield self.__read(idx)
+
+    # private methods
+    def __read(self, idx):
+        return self.__record.unpack_from(
+            self.__map, HEADER.size + idx * self.__record.size)
+
+    def __lower_bound(self, key):
+        """
+        binary search of the given key in the records.
+        :return: index of the first record with a key that is not smaller
+        """
+        low, high = 0, self.__size
+        offset = HEADER.size
+        record_size = self.__record.size
+        while low < high:
+            mid = (low + high) // 2
+            mid_key = struct.unpack_from("<Q", self.__map,
+                                         offset + mid * record_size)[0]
+            if mid_key < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+
+def build_index(path, record_paths, append=False, chunk=DEFAULT_CHUNK):
+    """
+    writes a position index of the games of the given record files.
+    :param path: path of the index file
+    :param record_paths: list of record file paths, of the same board size
+    :param append: if True and the index exists, the games are added to it
+    :param chunk: number of positions that are kept in memory
+    :return: number of positions in the index
+    """
+    existing = None
+    if append and os.path.exists(path):
+        existing = PositionIndex(path)
+    directory = os.path.dirname(os.path.abspath(path))
+    out_path = path + ".tmp"
+    runs = []
+    try:
+        row, col = _get_board_size(existing, record_paths)
+        record = record_struct(col)
+        positions = {}
+        for record_path in record_paths:
+            for moves, winner, metadata in read_records(record_path):
+                _add_game(positions, moves, winner, row, col)
+                if len(positions) >= chunk:
+                    _write_run(positions, record, directory, runs)
+                    positions = {}
+        if positions:
+            _write_run(positions, record, directory, runs)
+        sources = [_read_run(run, record) for run in runs]
+        if existing is not None:
+            sources.append(iter(existing))
+
+        size = 0
+        with open(out_path, "wb", buffering=RUN_BUFFER) as out:
+            out.write(HEADER.pack(MAGIC, row, col, 0))
+            for merged in _merge(heapq.merge(*sources)):
+                out.write(record.pack(*merged))
+                size += 1
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, row, col, size))
+        if existing is not None:
+            existing.close()
+            existing = None
+        os.replace(out_path, path)
+    finally:
+        if existing is not None:
+            existing.close()
+        for run in runs:
+            os.remove(run)
+        if os.path.exists(out_path):  # the build failed
+            os.remove(out_path)
+    return size
+
+
+def _get_board_size(existing, record_paths):
+    """
+    :param existing: the index that the games are added to, None for a new
+    index
+    :param record_paths: list of record file paths
+    :return: tuple of the rows and columns of the index - of the existing
+    index, or of the record files (the default size if there are none).
+    raises ValueError if the record files have other sizes.
+    """
+    size = None
+    if existing is not None:
+        size = existing.get_board_size()
+    for record_path in record_paths:
+        row, col, win_length = read_header(record_path)
+        if win_length != WIN_SEQUENCE:
+            raise ValueError("The position index is of four in a row.")
+        if size is None:
+            size = (row, col)
+        elif (row, col) != size:
+            raise ValueError("The record file has another board size.")
+    if size is None:
+        size = (ROW_SIZE, COL_SIZE)
+    if (size[0] + 1) * size[1] > 64:
+        raise ValueError("The board is too big for a position index.")
+    return size
+
+
+def _add_game(positions, moves, winner, row, col):
+    """
+    adds every position of a game to the given positions.
+    :param positions: dict of canonical key to list of the record values
+    (without the key)
+    :param winner: the winner, TIE_RESULT, or None if the game was not
+    finished
+    """
+    col_bits = row + 1
+    heights = [0] * col
+    # disks of each player, and of the mirror images of the positions
+    bits = [0, 0, 0]
+    mirror = [0, 0, 0]
+    player = PLAYER_A
+    for ply in range(len(moves) + 1):
+        key = bits[player] + (bits[PLAYER_A] | bits[PLAYER_B])
+        mirror_key = mirror[player] + (mirror[PLAYER_A] | mirror[PLAYER_B])
+        mirrored = mirror_key < key
+        if mirrored:
+            key = mirror_key
+        values = positions.get(key)
+        if values is None:
+            values = positions[key] = [0] * (4 + col)
+        values[0] += 1
+        if winner == TIE_RESULT:
+            values[3] += 1
+        elif winner == player:
+            values[1] += 1
+        elif winner is not None:
+            values[2] += 1
+        if ply == len(moves):
+            return
+        move = moves[ply]
+        if not 0 <= move < col or heights[move] == row:
+            raise ValueError("Illegal move")
+        values[4 + (col - 1 - move if mirrored else move)] += 1
+        bits[player] |= 1 << (move * col_bits + heights[move])
+        mirror[player] |= 1 << ((col - 1 - move) * col_bits + heights[move])
+        heights[move] += 1
+        player = PLAYER_B if player == PLAYER_A else PLAYER_A
+
+
+def _write_run(positions, record, directory, runs):
+    """
+    writes the given positions, sorted by key, to a temporary run file.
+    :param runs: list of the run files, that the new file is added to
+    before it is written - so it is removed even if the writing fails.
+    """
+    handle, run = tempfile.mkstemp(suffix=".run", dir=directory)
+    runs.append(run)
+    with os.fdopen(handle, "wb", buffering=RUN_BUFFER) as run_file:
+        for key in sorted(positions):
+            run_file.write(record.pack(key, *positions[key]))
+    return run
+
+
+def _read_run(run, record):
+    """
+    generator of the records of a run file.
+    """
+    block_size = record.size * (RUN_BUFFER // record.size)
+    with open(run, "rb") as run_file:
+        while True:
+            block = run_file.read(block_size)
+            if not block:
+                return
+            yield from record.iter_unpack(block)
+
+
+def _merge(records):
+    """
+    generator that sums the values of consecutive records of the same key.
+    :param records: records sorted by key
+    """
+    current = None
+    for record in records:
+        if current is not None and record[0] == current[0]:
+            current = [current[0]] + [a + b for a, b in
+                                      zip(current[1:], record[1:])]
+            continue
+        if current is not None:
+            yield current
+        current = record
+    if current is not None:
+        yield current
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build and query a connect four position index.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("build", help="index game records")
+    command.add_argument("path", help="index file")
+    command.add_argument("records", nargs="+", help="record files")
+    command.add_argument("--append", action="store_true",
+                         help="add the games to an existing index")
+    command.add_argument("--chunk", type=int, default=DEFAULT_CHUNK,
+                         help="positions kept in memory while building")
+    command = commands.add_parser("query", help="statistics of a position")
+    command.add_argument("path", help="index file")
+    command.add_argument("moves", nargs="?", default="",
+                         help="columns of the moves of the position, e.g. "
+                              "3,3,4")
+    args = parser.parse_args()
+    if args.command == "build":
+        size = build_index(args.path, args.records, args.append, args.chunk)
+        print("wrote %d positions to %s" % (size, args.path))
+        return
+    index = PositionIndex(args.path)
+    try:
+        game = Game(*index.get_board_size())
+        for col in filter(None, args.moves.split(",")):
+            game.make_move(int(col))
+        print(index.lookup(game.get_board(), game.get_current_player()))
+    finally:
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+"""
+compact game records. a record file starts with a header (the board size and
+the win length of its games), and is followed by one record per game:
+
+    moves count, winner, metadata length   (struct "<HBH")
+    the columns of the moves, 3 bits each  (ceil(3 * moves / 8) bytes)
+    metadata                               (utf-8 json, may be empty)
+
+the columns take 3 bits up to 8 columns, and more bits for wider boards.
+
+records are read and written one at a time, so files of any size can be
+streamed:
+
+    with RecordWriter("games.c4r") as writer:
+        writer.write_game(game, {"mode": "ai"})
+    for game, metadata in replay_records("games.c4r"):
+        ...
+"""
+from .game import Game, ROW_SIZE, COL_SIZE, TIE_RESULT, PLAYER_A, PLAYER_B
+from .win_detector import sequence_check, WIN_SEQUENCE
+import argparse
+import json
+import os
+import struct
+
+MAGIC = b"C4GR"
+VERSION = 1
+# magic, version, rows, columns, win length
+HEADER = struct.Struct("<4sBBBB")
+# number of moves, winner, metadata length
+RECORD = struct.Struct("<HBH")
+MOVE_BITS = 3
+# winner of a game that was not finished.
+UNFINISHED = 255
+BUFFER_SIZE = 1 << 20
+
+
+class RecordWriter:
+    """
+    class that defines record writer objects, that add game records to a
+    record file.
+    """
+
+    def __init__(self, path, row=ROW_SIZE, col=COL_SIZE, append=False,
+                 win_length=WIN_SEQUENCE):
+        """
+        constructor of record writer object.
+        :param path: path of the record file
+        :param row: amount of rows of the games
+        :param col: amount of columns of the games
+        :param append: if True and the file exists, the records are added
+        to its end. its board size and win length must be the same.
+        :param win_length: win length of the games
+        """
+        self.__move_bits = move_bits(col)
+        self.__count = 0
+        if append and os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as file:
+                if _read_header(file) != (row, col, win_length):
+                    raise ValueError("The record file has another board "
+                                     "size.")
+            self.__file = open(path, "ab", buffering=BUFFER_SIZE)
+        else:
+            self.__file = open(path, "wb", buffering=BUFFER_SIZE)
+            self.__file.write(HEADER.pack(MAGIC, VERSION, row, col,
+                                          win_length))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    # public methods
+    def write(self, moves, winner=None, metadata=None):
+        """
+        method that adds a game record.
+        :param moves: list of the columns of the moves
+        :param winner: the winner, TIE_RESULT, or None if the game was not
+        finished
+        :param metadata: json-serializable dict, or None
+        """
+        meta = b""
+        if metadata is not None:
+            meta = json.dumps(metadata, separators=(",", ":")).encode()
+        if winner is None:
+            winner = UNFINISHED
+        self.__file.write(RECORD.pack(len(moves), winner, len(meta)))
+        self.__file.write(pack_moves(moves, self.__move_bits))
+        self.__file.write(meta)
+        self.__count += 1
+
+    def write_game(self, game, metadata=None):
+        """
+        method that adds the record of the given game, of the board size of
+        the writer.
+        :param game: game object
+        :param metadata: json-serializable dict, or None
+        """
+        self.write(game.get_moves(), game.get_winner(), metadata)
+
+    def get_count(self):
+        """
+        :return: number of records that were written by this writer
+        """
+        return self.__count
+
+    def flush(self):
+        """
+        method that writes the buffered records to the file.
+        """
+        self.__file.flush()
+
+    def close(self):
+        self.__file.close()
+
+
+def move_bits(col):
+    """
+    :param col: amount of columns
+    :return: number of bits of a move - MOVE_BITS, or more for boards that
+    are too wide for it.
+    """
+    return max(MOVE_BITS, (col - 1).bit_length())
+
+
+def pack_moves(moves, bits=MOVE_BITS):
+    """
+    :param moves: list of columns
+    :param bits: bits per move
+    :return: bytes of the columns
+    """
+    packed = 0
+    for i, col in enumerate(moves):
+        packed |= col << (i * bits)
+    return packed.to_bytes((len(moves) * bits + 7) // 8, "little")
+
+
+def unpack_moves(data, count, bits=MOVE_BITS):
+    """
+    :param data: bytes of packed columns
+    :param count: number of moves
+    :param bits: bits per move
+    :return: list of columns
+    """
+    packed = int.from_bytes(data, "little")
+    mask = (1 << bits) - 1
+    return [(packed >> (i * bits)) & mask for i in range(count)]
+
+
+def read_header(path):
+    """
+    :return: tuple of the rows, columns and win length of the games of the
+    record file
+    """
+    with open(path, "rb") as file:
+        return _read_header(file)
+
+
+def read_records(path):
+    """
+    generator of the records of a record file, by their order in the file.
+    :return: tuples of the moves (list of columns), the winner (None if the
+    game was not finished) and the metadata (None if there is none).
+    """
+    with open(path, "rb", buffering=BUFFER_SIZE) as file:
+        bits = move_bits(_read_header(file)[1])
+        while True:
+            data = file.read(RECORD.size)
+            if not data:
+                return
+            if len(data) < RECORD.size:
+                raise ValueError("Truncated record file.")
+            count, winner, meta_length = RECORD.unpack(data)
+            moves_length = (count * bits + 7) // 8
+            data = file.read(moves_length + meta_length)
+            if len(data) < moves_length + meta_length:
+                raise ValueError("Truncated record file.")
+            metadata = None
+            if meta_length:
+                metadata = json.loads(data[moves_length:])
+            yield (unpack_moves(data[:moves_length], count, bits),
+                   None if winner == UNFINISHED else winner, metadata)
+
+
+def replay_records(path):
+    """
+    generator that replays every record of a record file through
+    Game.make_move.
+    :return: tuples of the game after all the moves of the record, and the
+    metadata of the record. raises ValueError on the first record that is
+    not a legal game.
+    """
+    size = read_header(path)
+    for index, (moves, winner, metadata) in enumerate(read_records(path)):
+        game = Game(*size)
+        try:
+            for col in moves:
+                game.make_move(col)
+        except ValueError:
+            raise ValueError("Record %d has an illegal move." % index)
+        if game.get_winner() != winner:
+            raise ValueError("Record %d has a wrong winner." % index)
+        yield game, metadata
+
+
+def check_moves(moves, row=ROW_SIZE, col=COL_SIZE, win_length=WIN_SEQUENCE):
+    """
+    finds the result of a move sequence without a Game object - only the
+    packed disks of the players are kept.
+    :param moves: list of columns
+    :return: the winner, TIE_RESULT, or None if the game is not over.
+    raises ValueError if a move is illegal.
+    """
+    col_bits = row + 1
+    heights = [0] * col
+    bits = [0, 0, 0]
+    player = PLAYER_A
+    has_win = sequence_check(win_length)
+    # no one can win before the first player's win_length-th move
+    first_win = 2 * (win_length - 1)
+    for idx, move in enumerate(moves):
+        if not 0 <= move < col or heights[move] == row:
+            raise ValueError("Illegal move")
+        bits[player] |= 1 << (move * col_bits + heights[move])
+        heights[move] += 1
+        if idx >= first_win and has_win(bits[player], col_bits):
+            if idx != len(moves) - 1:
+                raise ValueError("Illegal move")  # a move after a win
+            return player
+        player = PLAYER_B if player == PLAYER_A else PLAYER_A
+    if len(moves) == row * col:
+        return TIE_RESULT
+
+
+def validate_records(path):
+    """
+    generator of the records of a record file that are not legal games, or
+    that have a wrong winner. uses the fast path of check_moves.
+    :return: tuples of the index of the record and the error message
+    """
+    size = read_header(path)
+    for index, (moves, winner, metadata) in enumerate(read_records(path)):
+        try:
+            result = check_moves(moves, *size)
+        except ValueError:
+            yield index, "illegal move"
+            continue
+        if result != winner:
+            yield index, "wrong winner"
+
+
+def import_jsonl(jsonl_path, path, append=False,
+                 size=(ROW_SIZE, COL_SIZE, WIN_SEQUENCE)):
+    """
+    writes a record file of the games of a jsonl file, such as the results
+    of self_play. every line must have a "moves" list; the rest of its
+    fields are kept as metadata.
+    :param size: tuple of the rows, columns and win length of the games
+    :return: number of records
+    """
+    row, col, win_length = size
+    with RecordWriter(path, row, col, append, win_length) as writer, \
+            open(jsonl_path) as lines:
+        for line in lines:
+            if not line.strip():
+                continue
+            metadata = json.loads(line)
+            moves = metadata.pop("moves")
+            winner = metadata.pop("winner", None)
+            writer.write(moves, winner, metadata or None)
+        return writer.get_count()
+
+
+def export_jsonl(path, jsonl_path):
+    """
+    writes the records of a record file as lines of a jsonl file.
+    :return: number of records
+    """
+    count = 0
+    with open(jsonl_path, "w") as out:
+        for moves, winner, metadata in read_records(path):
+            line = {"moves": moves, "winner": winner}
+            line.update(metadata or {})
+            out.write(json.dumps(line) + "\n")
+            count += 1
+    return count
+
+
+def _read_header(file):
+    """
+    reads the header of an open record file.
+    :return: tuple of the rows, columns and win length
+    """
+    data = file.read(HEADER.size)
+    if len(data) < HEADER.size:
+        raise ValueError("Illegal record file.")
+    magic, version, row, col, win_length = HEADER.unpack(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Illegal record file.")
+    return row, col, win_length
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Import, export and check connect four game records.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    command = commands.add_parser("import", help="jsonl games to records")
+    command.add_argument("jsonl")
+    command.add_argument("path")
+    command.add_argument("--append", action="store_true")
+    command.add_argument("--rows", type=int, default=ROW_SIZE)
+    command.add_argument("--cols", type=int, default=COL_SIZE)
+    command.add_argument("--connect", type=int, default=WIN_SEQUENCE,
+                         help="length of a winning sequence")
+    command = commands.add_parser("export", help="records to jsonl games")
+    command.add_argument("path")
+    command.add_argument("jsonl")
+    command = commands.add_parser("check", help="find illegal records")
+    command.add_argument("path")
+    args = parser.parse_args()
+    if args.command == "import":
+        count = import_jsonl(args.jsonl, args.path, args.append,
+                             (args.rows, args.cols, args.connect))
+        print("wrote %d records to %s" % (count, args.path))
+    elif args.command == "export":
+        count = export_jsonl(args.path, args.jsonl)
+        print("wrote %d games to %s" % (count, args.jsonl))
+    else:
+        bad = 0
+        for index, error in validate_records(args.path):
+            print("record %d: %s" % (index, error))
+            bad += 1
+        print("%d illegal records" % bad)
+
+
+if __name__ == '__main__':
+    main()
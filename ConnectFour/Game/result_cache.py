@@ -0,0 +1,266 @@
+"""
+process-wide cache of the moves that the AI found. a position that is
+searched again with the same settings gets the move (and its score) of the
+first search, so a process that answers many queries - like the workers of
+the game server - finds repeated positions at once:
+
+    result_cache.configure(max_size=100000, ttl=3600, path="results.db")
+    AI(game, player, depth).find_legal_move()  # searched
+    AI(game, player, depth).find_legal_move()  # from the cache
+
+the cache is off until configure is called, and only the AIs that are
+created after it use it. with a path the results are also written to a
+sqlite file, so they survive restarts and are shared by all the processes
+that use the same file.
+"""
+import collections
+import threading
+import time
+
+DEFAULT_SIZE = 100000
+# results that are written to the spill file between two commits, and the
+# most seconds between them - a process that is not closed loses only the
+# results of the last seconds.
+COMMIT_INTERVAL = 100
+COMMIT_SECONDS = 5.0
+# seconds to wait for another process that writes to the spill file.
+DB_TIMEOUT = 1.0
+
+# the cache of this process, None if the cache is off.
+_cache = None
+
+
+class ResultCache:
+    """
+    class that defines result cache objects - a size-bounded cache of search
+    results, that drops the least recently used result when it is full.
+    results can also expire after a given time, and can be written to a
+    spill file. all the methods are thread safe.
+    """
+
+    def __init__(self, max_size=DEFAULT_SIZE, ttl=None, path=None):
+        """
+        constructor of result cache object.
+        :param max_size: maximal number of results in memory
+        :param ttl: seconds that a result is kept, None to keep it until it
+        is dropped for a newer one.
+        :param path: path of the sqlite spill file, None to keep the results
+        only in memory.
+        """
+        if max_size < 1:
+            raise ValueError("Illegal cache size.")
+        self.__max_size = max_size
+        self.__ttl = ttl
+        # key -> (result, expiry time or None), the least recent first
+        self.__entries = collections.OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__disk_hits = 0
+        self.__misses = 0
+        self.__stores = 0
+        self.__evictions = 0
+        self.__expired = 0
+        self.__uncommitted = 0
+        self.__last_commit = time.monotonic()
+        self.__db = None
+        if path is not None:
+            # imported here, so that a cache without a spill file does not
+            # load sqlite.
+            import sqlite3
+            self.__db = sqlite3.connect(path, timeout=DB_TIMEOUT,
+                                        check_same_thread=False)
+            self.__db.execute("CREATE TABLE IF NOT EXISTS results "
+                              "(key TEXT PRIMARY KEY, result TEXT, "
+                              "expires REAL)")
+            self.__db.commit()
+
+    # public methods
+    def get(self, key):
+        """
+        method that returns the result of the given key.
+        :param key: tuple of the position and the search settings
+        :return: the result, None if it is not in the cache or expired.
+        """
+        now = time.time()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                if entry[1] is None or entry[1] > now:
+                    self.__entries.move_to_end(key)
+                    self.__hits += 1
+                    return entry[0]
+                del self.__entries[key]
+                self.__expired += 1
+            entry = self.__load(key, now)
+            if entry is None:
+                self.__misses += 1
+                return None
+            self.__hits += 1
+            self.__disk_hits += 1
+            self.__add(key, entry)
+            return entry[0]
+
+    def put(self, key, result):
+        """
+        method that saves the result of the given key.
+        :param key: tuple of the position and the search settings
+        :param result: tuple of ints and Nones, or of such tuples
+        """
+        expires = None
+        if self.__ttl is not None:
+            expires = time.time() + self.__ttl
+        with self.__lock:
+            self.__add(key, (result, expires))
+            self.__stores += 1
+            if self.__db is not None:
+                self.__write(key, result, expires)
+
+    def get_stats(self):
+        """
+        method that returns the statistics of the cache.
+        :return: dict of the number of results in memory, hits (with the
+        hits of the spill file), misses, stores, evictions, expired
+        results, and the rate of the lookups that hit - None if there were
+        no lookups.
+        """
+        with self.__lock:
+            lookups = self.__hits + self.__misses
+            return {"size": len(self.__entries), "hits": self.__hits,
+                    "disk_hits": self.__disk_hits, "misses": self.__misses,
+                    "stores": self.__stores, "evictions": self.__evictions,
+                    "expired": self.__expired,
+                    "hit_rate": self.__hits / lookups if lookups else None}
+
+    def clear(self):
+        """
+        method that removes all the results, also from the spill file.
+        """
+        with self.__lock:
+            self.__entries.clear()
+            if self.__db is not None:
+                self.__db.execute("DELETE FROM results")
+                self.__db.commit()
+                self.__uncommitted = 0
+
+    def flush(self):
+        """
+        method that commits the results that were written to the spill
+        file.
+        """
+        with self.__lock:
+            if self.__db is not None and self.__uncommitted:
+                self.__commit()
+
+    def close(self):
+        """
+        method that commits and closes the spill file.
+        """
+        self.flush()
+        with self.__lock:
+            if self.__db is not None:
+                self.__db.close()
+                self.__db = None
+
+    def __len__(self):
+        return len(self.__entries)
+
+    # private methods
+    def __add(self, key, entry):
+        """
+        adds an entry to the memory, and drops the least recently used
+        entry if the cache is full.
+        """
+        self.__entries[key] = entry
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > self.__max_size:
+            self.__entries.popitem(last=False)
+            self.__evictions += 1
+
+    def __load(self, key, now):
+        """
+        reads an entry from the spill file.
+        :return: (result, expiry time) tuple, None if the key is not in the
+        file or expired.
+        """
+        if self.__db is None:
+            return None
+        import json
+        import sqlite3
+        try:
+            row = self.__db.execute(
+                "SELECT result, expires FROM results WHERE key = ?",
+                (repr(key),)).fetchone()
+        except sqlite3.OperationalError:  # locked by another process
+            return None
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= now:
+            self.__expired += 1
+            return None
+        return _from_json(json.loads(row[0])), row[1]
+
+    def __write(self, key, result, expires):
+        """
+        writes an entry to the spill file. the entries are committed in
+        batches, since every commit syncs the file.
+        """
+        import json
+        import sqlite3
+        try:
+            self.__db.execute("INSERT OR REPLACE INTO results VALUES "
+                              "(?, ?, ?)",
+                              (repr(key), json.dumps(result), expires))
+        except sqlite3.OperationalError:  # locked by another process
+            return
+        self.__uncommitted += 1
+        if (self.__uncommitted >= COMMIT_INTERVAL or
+                time.monotonic() - self.__last_commit >= COMMIT_SECONDS):
+            self.__commit()
+
+    def __commit(self):
+        import sqlite3
+        try:
+            self.__db.commit()
+            self.__uncommitted = 0
+            self.__last_commit = time.monotonic()
+        except sqlite3.OperationalError:  # tried again on the next commit
+            pass
+
+
+def configure(max_size=DEFAULT_SIZE, ttl=None, path=None):
+    """
+    turns on the cache of this process, instead of the previous one (see
+    ResultCache for the parameters).
+    :return: the new cache
+    """
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = ResultCache(max_size, ttl, path)
+    return _cache
+
+
+def disable():
+    """
+    turns off the cache of this process.
+    """
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = None
+
+
+def get_cache():
+    """
+    :return: the cache of this process, None if the cache is off
+    """
+    return _cache
+
+
+def _from_json(value):
+    """
+    :return: the given json value with its lists as tuples
+    """
+    if isinstance(value, list):
+        return tuple(_from_json(item) for item in value)
+    return value
@@ -0,0 +1,102 @@
+START = "start"
+DEPTH = "depth"
+DONE = "done"
+
+
+class SearchStats:
+    """
+    class that defines the statistics of one AI search (one call of
+    AI.find_legal_move).
+    """
+
+    def __init__(self, source="search"):
+        """
+        constructor of search stats object.
+        :param source: how the move was found - "search", "parallel",
+        "book", "solver", "ponder" (found while pondering, or searched on
+        from the result of pondering, see AI.ponder) or "cache" (see
+        result_cache)
+        """
+        self.source = source
+        self.nodes = 0
+        self.leaf_evals = 0
+        self.win_checks = 0
+        self.cutoffs = 0
+        self.tt_hits = 0
+        self.tt_misses = 0
+        # (depth, seconds since the search start, best move, score) of every
+        # completed depth.
+        self.depths = []
+        # the expected moves of both players from the searched position.
+        self.principal_variation = []
+        self.move = None
+        self.seconds = 0.0
+
+    def get_tt_hit_rate(self):
+        """
+        :return: rate of the transposition table lookups that found the
+        position, None if there were no lookups.
+        """
+        lookups = self.tt_hits + self.tt_misses
+        if lookups:
+            return self.tt_hits / lookups
+
+    def to_dict(self):
+        """
+        :return: dict of all the statistics, e.g. for a metrics exporter
+        """
+        return {"source": self.source, "move": self.move,
+                "seconds": self.seconds, "nodes": self.nodes,
+                "leaf_evals": self.leaf_evals,
+                "win_checks": self.win_checks, "cutoffs": self.cutoffs,
+                "tt_hits": self.tt_hits, "tt_misses": self.tt_misses,
+                "tt_hit_rate": self.get_tt_hit_rate(),
+                "depths": [list(depth) for depth in self.depths],
+                "principal_variation": self.principal_variation}
+
+
+class SearchProfiler:
+    """
+    context manager that runs cProfile during the searches of an AI:
+
+        with SearchProfiler(ai) as profiler:
+            ai.find_legal_move()
+        profiler.get_stats().sort_stats("cumulative").print_stats(10)
+    """
+
+    def __init__(self, ai):
+        """
+        :param ai: AI object to profile
+        """
+        # imported here, so that the AI does not load the profiler.
+        import cProfile
+        self.__ai = ai
+        self.__profile = cProfile.Profile()
+        # the statistics setting of the AI before the profiling
+        self.__stats_enabled = False
+
+    def __enter__(self):
+        # add_hook enables the statistics of the AI
+        self.__stats_enabled = self.__ai.get_stats_enabled()
+        self.__ai.add_hook(self.__hook)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.__ai.remove_hook(self.__hook)
+        self.__ai.set_stats_enabled(self.__stats_enabled)
+
+    def get_stats(self):
+        """
+        :return: pstats.Stats of all the profiled searches
+        """
+        import pstats
+        return pstats.Stats(self.__profile)
+
+    def __hook(self, event, stats):
+        """
+        starts the profiler when a search starts, and stops it when it ends.
+        """
+        if event == START:
+            self.__profile.enable()
+        elif event == DONE:
+            self.__profile.disable()
@@ -0,0 +1,303 @@
+from .transposition_table import TranspositionTable, LOWER_BOUND, \
+    UPPER_BOUND
+from .win_detector import WIN_SEQUENCE
+import time
+
+WIN = 1
+DRAW = 0
+LOSS = -1
+# number of searched positions between two checks of the clock - well
+# under a millisecond of solving.
+CLOCK_CHECK_NODES = 64
+# milliseconds before the timeout that the solver stops, so that the time
+# between two checks of the clock and the time to return from the solver do
+# not go past it.
+TIMEOUT_MARGIN = 1
+
+
+class SolverTimeout(Exception):
+    """
+    raised inside the solver when its deadline has passed.
+    """
+
+
+class Solver:
+    """
+    class that defines solver objects, that find the exact result of a
+    position with perfect play of both players. the solver works on the
+    packed disks of a BitBoard, kept as the disks of the player that its his
+    turn and the mask of all the disks.
+    the score of a position is positive if the player that its his turn
+    wins - the number of cells that are still empty after the winning move,
+    plus one, so the faster the win the higher the score. a draw scores 0 and
+    a loss is the negative score of the opponent's win. the solver narrows
+    the score with null-window searches (an MTD(f) style binary search).
+    """
+
+    def __init__(self, row, col, table=None, win_length=WIN_SEQUENCE):
+        """
+        constructor of solver object.
+        :param row: amount of rows
+        :param col: amount of columns
+        :param table: transposition table of the solver. it must not be
+        shared with a depth-limited search.
+        :param win_length: length of a winning sequence
+        """
+        self.__rows = row
+        self.__cols = col
+        self.__win_length = win_length
+        self.__cells = row * col
+        self.__col_bits = row + 1
+        self.__bottom = sum(1 << (c * self.__col_bits) for c in range(col))
+        self.__board_mask = self.__bottom * ((1 << row) - 1)
+        self.__col_masks = [((1 << row) - 1) << (c * self.__col_bits)
+                            for c in range(col)]
+        self.__order = sorted(range(col), key=lambda c: abs(col // 2 - c))
+        if table is None:
+            table = TranspositionTable()
+        self.__table = table
+        self.__nodes = 0
+        self.__deadline = None
+        self.__stop = None
+
+    # public methods
+    def solve(self, board, player, timeout=None, stop=None):
+        """
+        method that finds the score of the given position.
+        :param board: bitboard object
+        :param player: the player that its his turn
+        :param timeout: time limit in milliseconds. if the time is up before
+        the position is solved, raises SolverTimeout.
+        :param stop: threading.Event - if it is set before the position is
+        solved, raises SolverTimeout.
+        :return: score
+        """
+        current = board.get_player_bits(player)
+        mask = board.get_mask()
+        self.__start_clock(timeout, stop)
+        return self.__solve(current, mask, bin(mask).count("1"))
+
+    def solve_moves(self, board, player, timeout=None, stop=None):
+        """
+        method that finds the score of every possible move of the given
+        position.
+        :param board: bitboard object
+        :param player: the player that its his turn
+        :param timeout: time limit in milliseconds for all the moves. if the
+        time is up, raises SolverTimeout.
+        :param stop: threading.Event - if it is set, raises SolverTimeout.
+        :return: dict of column to the score of the move (for the player)
+        """
+        current = board.get_player_bits(player)
+        mask = board.get_mask()
+        disks = bin(mask).count("1")
+        self.__start_clock(timeout, stop)
+        scores = {}
+        for col in self.__order:
+            if mask & self.__col_masks[col] == self.__col_masks[col]:
+                continue
+            move = (mask + (1 << (col * self.__col_bits))) & \
+                self.__col_masks[col]
+            if self.__winning_cells(current, mask) & move:
+                scores[col] = self.__cells - disks
+                continue
+            scores[col] = -self.__solve(current ^ mask, mask | move,
+                                        disks + 1)
+        return scores
+
+    def get_result(self, score, disks):
+        """
+        method that translates a score to the result of the game.
+        :param score: score of a position
+        :param disks: number of disks on the board of the position
+        :return: tuple of the result (WIN, DRAW or LOSS, for the player that
+        its his turn) and the number of moves (of both players) until the
+        game ends.
+        """
+        if score == 0:
+            return DRAW, self.__cells - disks
+        moves = self.__cells + 1 - abs(score) - disks
+        if score > 0:
+            return WIN, moves
+        return LOSS, moves
+
+    def get_nodes(self):
+        """
+        :return: number of positions that the last solve visited
+        """
+        return self.__nodes
+
+    # private methods
+    def __start_clock(self, timeout, stop):
+        """
+        resets the node count and sets the deadline of a new solve.
+        """
+        self.__nodes = 0
+        self.__stop = stop
+        self.__deadline = None
+        if timeout is not None:
+            self.__deadline = (time.monotonic() +
+                               max(0, timeout - TIMEOUT_MARGIN) / 1000)
+        elif stop is not None:
+            # the clock is checked for the stop event as well
+            self.__deadline = float("inf")
+
+    def __solve(self, current, mask, disks):
+        """
+        finds the score of a position with null-window searches that narrow
+        the range of possible scores.
+        :return: score
+        """
+        if self.__winning_cells(current, mask) & self.__possible(mask):
+            return self.__cells - disks
+        low = -(self.__cells - disks)
+        high = self.__cells - disks
+        while low < high:
+            med = low + (high - low) // 2
+            # try the small scores (close to a draw) first.
+            if med <= 0 and low // 2 < med:
+                med = low // 2
+            elif med >= 0 and high // 2 > med:
+                med = high // 2
+            score = self.__negamax(current, mask, disks, med, med + 1)
+            if score <= med:
+                high = score
+            else:
+                low = score
+        return low
+
+    def __negamax(self, current, mask, disks, alpha, beta):
+        """
+        searches the position with alpha-beta pruning. the player that its
+        his turn can not win with his next move.
+        :param current: disks of the player that its his turn
+        :param mask: disks of both players
+        :param disks: number of disks on the board
+        :return: the score, if it is between alpha and beta. otherwise a
+        bound of the score on the same side of the window.
+        """
+        self.__nodes += 1
+        if (self.__deadline is not None and
+                not self.__nodes % CLOCK_CHECK_NODES and
+                (time.monotonic() > self.__deadline or
+                 self.__stop is not None and self.__stop.is_set())):
+            raise SolverTimeout()
+
+        moves = self.__non_losing_moves(current, mask)
+        if not moves:  # the opponent wins with his next move
+            return -(self.__cells - disks - 1)
+        if disks >= self.__cells - 2:  # no one can win any more
+            return 0
+
+        # the opponent can not win with his next move
+        low = -(self.__cells - disks - 3)
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+        # the player can not win with his next move
+        high = self.__cells - disks - 2
+        key = current + mask
+        entry = self.__table.get(key)
+        if entry is not None:
+            if entry[2] == UPPER_BOUND and entry[3] < high:
+                high = entry[3]
+            elif entry[2] == LOWER_BOUND and entry[3] > alpha:
+                alpha = entry[3]
+                if alpha >= beta:
+                    return alpha
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        opponent = current ^ mask
+        for move in self.__sorted_moves(current, mask, moves):
+            score = -self.__negamax(opponent, mask | move, disks + 1, -beta,
+                                    -alpha)
+            if score >= beta:
+                self.__table.store(key, 0, LOWER_BOUND, score, None)
+                return score
+            if score > alpha:
+                alpha = score
+        self.__table.store(key, 0, UPPER_BOUND, alpha, None)
+        return alpha
+
+    def __sorted_moves(self, current, mask, moves):
+        """
+        orders the given moves - the moves that leave the player more cells
+        to win in first, the central columns first among equal moves.
+        :param moves: bits of the cells of the moves
+        :return: list of move bits
+        """
+        rated = []
+        for col in self.__order:
+            move = moves & self.__col_masks[col]
+            if move:
+                threats = self.__winning_cells(current | move, mask | move)
+                rated.append((-bin(threats).count("1"), len(rated), move))
+        rated.sort()
+        return [move for threats, idx, move in rated]
+
+    def __possible(self, mask):
+        """
+        :return: bits of the cells that can be played
+        """
+        return (mask + self.__bottom) & self.__board_mask
+
+    def __non_losing_moves(self, current, mask):
+        """
+        :return: bits of the possible moves that do not let the opponent win
+        with his next move.
+        """
+        possible = self.__possible(mask)
+        opponent_wins = self.__winning_cells(current ^ mask, mask)
+        forced = possible & opponent_wins
+        if forced:
+            if forced & (forced - 1):  # two threats can not be blocked
+                return 0
+            possible = forced
+        # do not play below a cell that the opponent wins in
+        return possible & ~(opponent_wins >> 1)
+
+    def __winning_cells(self, position, mask):
+        """
+        :param position: disks of a player
+        :param mask: disks of both players
+        :return: bits of the empty cells that complete a winning sequence of
+        the player
+        """
+        if self.__win_length != 4:
+            return self.__winning_cells_n(position, mask)
+        # vertical
+        cells = (position << 1) & (position << 2) & (position << 3)
+        for shift in (self.__col_bits, self.__col_bits - 1,
+                      self.__col_bits + 1):
+            pair = (position << shift) & (position << (2 * shift))
+            cells |= pair & (position << (3 * shift))
+            cells |= pair & (position >> shift)
+            pair = (position >> shift) & (position >> (2 * shift))
+            cells |= pair & (position << shift)
+            cells |= pair & (position >> (3 * shift))
+        return cells & (self.__board_mask ^ mask)
+
+    def __winning_cells_n(self, position, mask):
+        """
+        like __winning_cells, for any win length. a cell wins if, for one of
+        the places of the cell in a sequence, all the other cells of the
+        sequence are disks of the player.
+        """
+        length = self.__win_length
+        cells = 0
+        for shift in (1, self.__col_bits, self.__col_bits - 1,
+                      self.__col_bits + 1):
+            for place in range(length):
+                seq = self.__board_mask
+                for other in range(length):
+                    offset = (place - other) * shift
+                    if offset > 0:
+                        seq &= position << offset
+                    elif offset < 0:
+                        seq &= position >> -offset
+                cells |= seq
+        return cells & (self.__board_mask ^ mask)
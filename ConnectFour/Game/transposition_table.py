@@ -0,0 +1,104 @@
+# a prime size spreads the bitboard keys evenly over the slots.
+DEFAULT_SIZE = 262139
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+class TranspositionTable:
+    """
+    class that defines transposition tables - a fixed size cache of searched
+    positions. every position is kept in the slot of its key modulo the size
+    of the table, as a (key, depth, flag, score, move, generation) tuple.
+    when two positions share a slot, the entry of the older search or of
+    the shallower depth is replaced.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE):
+        """
+        constructor of transposition table object.
+        :param size: maximal number of entries in the table. should be a
+        prime, since the keys are bitboards and their low bits repeat.
+        """
+        if size < 1:
+            raise ValueError("Illegal table size.")
+        self.__size = size
+        self.__entries = [None] * size
+        self.__generation = 0
+        self.__used = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__collisions = 0
+        self.__stores = 0
+
+    # public methods
+    def get(self, key):
+        """
+        method that returns the entry of the given position.
+        :param key: unique key of the position
+        :return: (key, depth, flag, score, move, generation) tuple, None if
+        the position is not in the table.
+        """
+        entry = self.__entries[key % self.__size]
+        if entry is not None and entry[0] == key:
+            self.__hits += 1
+            return entry
+        self.__misses += 1
+        if entry is not None:
+            self.__collisions += 1
+
+    def store(self, key, depth, flag, score, move):
+        """
+        method that saves the search result of a position.
+        :param key: unique key of the position
+        :param depth: the depth that the position was searched to
+        :param flag: EXACT, LOWER_BOUND or UPPER_BOUND - how the score
+        bounds the real score of the position
+        :param score: the found score
+        :param move: the best found move, None if not known
+        :return: True if the entry was saved, False if a more valuable entry
+        kept its slot.
+        """
+        idx = key % self.__size
+        entry = self.__entries[idx]
+        if entry is None:
+            self.__used += 1
+        elif (entry[0] != key and entry[5] == self.__generation and
+              entry[1] > depth):
+            return False
+        self.__entries[idx] = (key, depth, flag, score, move,
+                               self.__generation)
+        self.__stores += 1
+        return True
+
+    def new_search(self):
+        """
+        method that marks the start of a new search. entries of previous
+        searches are kept, but are replaced first.
+        """
+        self.__generation += 1
+
+    def clear(self):
+        """
+        method that removes all the entries and resets the statistics.
+        """
+        self.__entries = [None] * self.__size
+        self.__generation = 0
+        self.__used = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__collisions = 0
+        self.__stores = 0
+
+    def get_stats(self):
+        """
+        method that returns the statistics of the table.
+        :return: dict of the table size, used slots, hits, misses, collisions
+        (misses on a slot that held another position) and stores.
+        """
+        return {"size": self.__size, "used": self.__used,
+                "hits": self.__hits, "misses": self.__misses,
+                "collisions": self.__collisions, "stores": self.__stores}
+
+    def __len__(self):
+        return self.__used
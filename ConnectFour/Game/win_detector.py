@@ -1,24 +1,104 @@
+from .bit_board import BitBoard
+
 WIN_SEQUENCE = 4
 DIRECTIONS_PROG = {"E": (1, 0), "W": (-1, 0), "N": (0, -1), "S": (0, 1),
                    "NE": (1, -1), "NW": (-1, -1), "SE": (1, 1), "SW": (-1, 1)}
+# the directions that a winning sequence can go in from the last move - row,
+# column and the two diagonals.
+WIN_DIRECTIONS = (("E", "W"), ("S",), ("SE", "NW"), ("NE", "SW"))
+
+
+def has_four(bits, col_bits):
+    """
+    checks if the given packed disks (see BitBoard) contain a winning
+    sequence. each direction is checked by shifting the disks onto their
+    neighbours and and-ing, so the check takes a constant number of integer
+    operations.
+    :param bits: packed disks of one player
+    :param col_bits: bits per column of the packing
+    :return: bool value
+    """
+    # vertical, horizontal, diagonal (/) and diagonal (\) neighbours.
+    for shift in (1, col_bits, col_bits + 1, col_bits - 1):
+        pairs = bits & (bits >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
+def has_five(bits, col_bits):
+    """
+    like has_four, for a sequence of five disks.
+    :param bits: packed disks of one player
+    :param col_bits: bits per column of the packing
+    :return: bool value
+    """
+    for shift in (1, col_bits, col_bits + 1, col_bits - 1):
+        pairs = bits & (bits >> shift)
+        if pairs & (pairs >> (2 * shift)) & (bits >> (4 * shift)):
+            return True
+    return False
+
+
+def has_sequence(bits, col_bits, length=WIN_SEQUENCE):
+    """
+    checks if the given packed disks contain a sequence of the given length,
+    like has_four. the runs of disks are doubled (2, 4, 8...) and then
+    completed with one more shift, so any length takes O(log(length))
+    operations per direction. the disks are a python int, so boards of
+    more than 64 bits need no other representation.
+    :param bits: packed disks of one player
+    :param col_bits: bits per column of the packing
+    :param length: length of a winning sequence
+    :return: bool value
+    """
+    if length == 4:
+        return has_four(bits, col_bits)
+    if length == 5:
+        return has_five(bits, col_bits)
+    for shift in (1, col_bits, col_bits + 1, col_bits - 1):
+        # the bits that start a run of 'run' disks
+        seq = bits
+        run = 1
+        while 2 * run <= length:
+            seq &= seq >> (run * shift)
+            run *= 2
+        if run < length:
+            seq &= seq >> ((length - run) * shift)
+        if seq:
+            return True
+    return False
+
+
+def sequence_check(length):
+    """
+    :param length: length of a winning sequence
+    :return: the fastest function of (bits, col_bits) that checks for a
+    sequence of the given length.
+    """
+    if length == 4:
+        return has_four
+    if length == 5:
+        return has_five
+    return lambda bits, col_bits: has_sequence(bits, col_bits, length)
 
 
 class WinDetector:
     """
     a class responsible on detect a win in a given board.
     """
+    __slots__ = ("__board", "__win_length", "__win_seq", "__last_win")
 
-    def __init__(self, board):
+    def __init__(self, board, win_length=WIN_SEQUENCE):
         """
         :param board: the board object that the class will look in.
+        :param win_length: length of a winning sequence
         """
         self.__board = board
+        self.__win_length = win_length
         self.__win_seq = []
-        # Defines the funcs that search for win in the different directions.
-        self.__won_row = self.__win_searcher(["E", "W"])
-        self.__won_col = self.__win_searcher(["S"])
-        self.__won_diagonal_a = self.__win_searcher(["SE", "NW"])
-        self.__won_diagonal_b = self.__win_searcher(["NE", "SW"])
+        # (board, last move, player) of the last found win on a bitboard.
+        self.__last_win = None
 
     # Public methods:
 
@@ -32,48 +112,50 @@ class WinDetector:
         """
         if board is None:
             board = self.__board
-        return (self.__won_row(board, last_move, player) or
-                self.__won_col(board, last_move, player) or
-                self.__won_diagonal_a(board, last_move, player) or
-                self.__won_diagonal_b(board, last_move, player))
+        if isinstance(board, BitBoard):
+            rows = board.get_size()[0]
+            if has_sequence(board.get_player_bits(player), rows + 1,
+                            self.__win_length):
+                # the winning cells are found only if they are requested.
+                self.__win_seq = None
+                self.__last_win = (board, last_move, player)
+                return True
+            return False
+        return self.__search_win(board, last_move, player)
 
     def get_win_seq(self):
-        """ Getter """
+        """
+        Getter. after a win on a bitboard, the winning cells are searched
+        here, on the board as it is at the time of the call.
+        """
+        if self.__win_seq is None:
+            board, last_move, player = self.__last_win
+            self.__win_seq = []
+            self.__search_win(board, last_move, player)
         return self.__win_seq
 
     # Private methods:
 
-    def __win_searcher(self, directions):
+    def __search_win(self, board, last_move, player):
         """
-        get directions and return a func that search for win in those
-        directions.
-        :param directions: A list of strings each one represent a direction
-        :return: func.
+        checks if the player won with the last move, by counting his disks
+        from the move in every pair of opposite directions.
+        :return: bool value.
         """
-
-        def searcher(board, last_move, player):
-            """
-            get player and last move and checks i the player won with this
-            move (in the cashed directions).
-            :return: bool value.
-            """
+        for directions in WIN_DIRECTIONS:
             # set win seq to the last move
             win_seq = [[last_move[0], last_move[1]]]
-            is_won = False
             for direction in directions:
-                if len(win_seq) < WIN_SEQUENCE:
-                    temp_seq = self.__count_sequence(board, direction,
+                if len(win_seq) < self.__win_length:
+                    win_seq += self.__count_sequence(board, direction,
                                                      last_move, player)
-                    win_seq += temp_seq
                 else:
                     break
 
-            if len(win_seq) >= WIN_SEQUENCE:
-                is_won = True
+            if len(win_seq) >= self.__win_length:
                 self.__win_seq = win_seq
-            return is_won
-
-        return searcher
+                return True
+        return False
 
     def __count_sequence(self, board, direction, start_point, player):
         """
@@ -91,8 +173,8 @@ class WinDetector:
         # progression on the axises
         col += delta_x
         row += delta_y
-        # need to check maximum 3 cells
-        for i in range(WIN_SEQUENCE - 1):
+        # need to check maximum win length - 1 cells
+        for i in range(self.__win_length - 1):
             try:
                 if board.get_cell_content(row, col) != player:
                     break
@@ -0,0 +1,4 @@
+"""
+connect four. the engine, the AI and the headless tools (ConnectFour.Game,
+self_play, server) do not import Tk - only gui and app do.
+"""
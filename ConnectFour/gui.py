@@ -1,17 +1,26 @@
 import tkinter as tki
 from tkinter import messagebox
 from .Game.ai_player import AI
+import os
+import queue
+import threading
 import time
 
 CIRCLE_SIZE = 42
-COLUMNS = 7
-ROWS = 6
+EMPTY_CLR = "white"
 USER_TYPE = 1
 AI_TYPE = 2
 TIE = 0
-AI_DELAY = 0.2
-CELL_FRAME_IMG = "Resources/board_cell.png"
-LOGO_PNG = 'Resources/logo.png'
+# minimal milliseconds between the start of an AI turn and its move.
+AI_DELAY = 200
+# milliseconds between two checks for the move of a running AI search.
+POLL_DELAY = 20
+# the images are in the package, so the gui runs from any directory. they
+# are loaded when a board is created.
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "Resources")
+CELL_FRAME_IMG = os.path.join(RESOURCES_DIR, "board_cell.png")
+LOGO_PNG = os.path.join(RESOURCES_DIR, "logo.png")
 SCORE_TXT = "PLAYER %s\n %d"
 PLAYER_TURN_MSG = "Player %s turn"
 WINNING_MSG = "Player %s WON!"
@@ -21,6 +30,8 @@ PLAY_AGAIN_MSG = "Would you like to play again?"
 WIN_CELLS_CLR = "gold3"
 ERROR_MSG = "Invalid move"
 ERROR_TITLE = "Error"
+AI_ERROR_MSG = "The AI failed to find a move (%s).\nIt plays the first free " \
+               "column instead."
 PLAYER_A_NAME = 'A'
 PLAYER_B_NAME = 'B'
 
@@ -35,14 +46,34 @@ class Gui:
         # Fields
         self.__parent = parent
         self.__game = game
+        self.__rows, self.__cols = game.get_size()
         self.__player_a = player_a
         self.__player_b = player_b
         if self.__player_a.get_type() == AI_TYPE:
             self.__ai_a = AI(game, self.__player_a.get_name())
         if self.__player_b.get_type() == AI_TYPE:
             self.__ai_b = AI(game, self.__player_b.get_name())
-        self.__canvas_cells = []
+        # the board is one canvas. the circle of every cell is an item of
+        # it, tagged with "cell", and its color is kept to skip repaints
+        # that change nothing.
+        self.__canvas = None
+        self.__cell_width = 0
+        self.__circles = []
+        self.__colors = []
+        # the column under the mouse, and the cell that is painted to show
+        # the move in it.
+        self.__hover_col = None
+        self.__hover_cell = None
         self.__another_game = False
+        # the AI searches in a worker thread, that puts its move in the
+        # queue. the Tk thread polls the queue, so the window is not frozen.
+        self.__ai_moves = queue.Queue()
+        self.__stop_search = None
+        # while a user thinks, the ai opponent ponders in a worker thread.
+        # tuple of the thread and its stop event, None if no ai ponders.
+        self.__pondering = None
+        self.__closed = False
+        self.__parent.protocol("WM_DELETE_WINDOW", self.__close)
 
         # GUI init
         self.__create_board(parent)
@@ -51,35 +82,129 @@ class Gui:
         self.__turn_info_lbl = tki.Label(labels_frame)
         self.__init_labels(labels_frame)
 
-        # start game
-        self.__parent.update()
-        self.__turn_manager()
+        # start game, once the window is shown
+        self.__parent.after_idle(self.__turn_manager)
 
     # private methods
     def __ai_turn(self):
         """
-        method that does one turn of the ai. gets a turn using the ai method
-        and executes it on the gui.
+        method that starts one turn of the ai. the move is searched in a
+        worker thread, and made on the gui by __poll_ai_move.
         """
         player = self.__get_current_player()
-        if player is self.__player_a:
-            ai = self.__ai_a
-        else:
-            ai = self.__ai_b
+        ai = self.__get_ai(player)
+        self.__stop_search = threading.Event()
+        worker = threading.Thread(target=self.__search_move,
+                                  args=(ai, self.__stop_search), daemon=True)
+        worker.start()
+        self.__parent.after(POLL_DELAY, self.__poll_ai_move, player,
+                            time.monotonic())
 
+    def __search_move(self, ai, stop):
+        """
+        method that runs in the worker thread. puts the move of the ai in the
+        queue - None if there is no move, or the exception of a failed
+        search, so the Tk thread never waits for a move that does not come.
+        """
+        move = None
         try:
-            move = ai.find_legal_move()
-            self.__make_move(player, move)
-        except AttributeError:
+            move = ai.find_legal_move(stop=stop)
+        except AttributeError:  # the game is over
+            pass
+        except Exception as error:
+            move = error
+        finally:
+            self.__ai_moves.put(move)
+
+    def __poll_ai_move(self, player, start):
+        """
+        method that checks if the running ai search is over, and makes its
+        move not before AI_DELAY has passed since the turn started.
+        :param player: the ai player
+        :param start: time.monotonic() of the start of the turn
+        """
+        if self.__closed:
+            return
+        try:
+            move = self.__ai_moves.get_nowait()
+        except queue.Empty:
+            self.__parent.after(POLL_DELAY, self.__poll_ai_move, player,
+                                start)
+            return
+        self.__stop_search = None
+        if move is None:
             return
+        if isinstance(move, Exception):
+            messagebox.showerror(ERROR_TITLE, AI_ERROR_MSG % move)
+            col_counter = self.__game.get_column_dict()
+            move = next(col for col in range(self.__cols)
+                        if col_counter[col] < self.__rows)
+        delay = AI_DELAY - int((time.monotonic() - start) * 1000)
+        self.__parent.after(max(delay, 0), self.__make_move, player, move)
 
     def __turn_manager(self):
         """
-        method that is being called consistently and calls ai turn if
-        it needs to make a turn.
+        method that is called after every move (from the Tk event loop, so
+        AI vs AI games do not grow the call stack) and starts an ai turn if
+        the current player is an ai, or the pondering of an ai opponent of a
+        user.
         """
+        if self.__closed or self.__game.get_winner() is not None:
+            return
         if self.__get_current_player().get_type() == AI_TYPE:
             self.__ai_turn()
+        else:
+            self.__start_pondering()
+
+    def __start_pondering(self):
+        """
+        method that starts the pondering of the ai opponent of the current
+        player (see AI.ponder), if the opponent is an ai.
+        """
+        player = self.__get_current_player()
+        if player is self.__player_a:
+            opponent = self.__player_b
+        else:
+            opponent = self.__player_a
+        if opponent.get_type() != AI_TYPE:
+            return
+        stop = threading.Event()
+        worker = threading.Thread(target=self.__get_ai(opponent).ponder,
+                                  args=(stop,), daemon=True)
+        worker.start()
+        self.__pondering = (worker, stop)
+
+    def __stop_pondering(self):
+        """
+        method that stops the pondering ai and waits for its thread, so that
+        the game can be changed.
+        """
+        if self.__pondering is not None:
+            worker, stop = self.__pondering
+            stop.set()
+            worker.join()
+            self.__pondering = None
+
+    def __close(self):
+        """
+        method that is called when the window is closed. stops the running
+        ai search and destroys the window.
+        """
+        self.__closed = True
+        if self.__stop_search is not None:
+            self.__stop_search.set()
+        if self.__pondering is not None:
+            self.__pondering[1].set()
+        self.__parent.destroy()
+
+    def __get_ai(self, player):
+        """
+        :param player: ai player object
+        :return: the AI object of the player
+        """
+        if player is self.__player_a:
+            return self.__ai_a
+        return self.__ai_b
 
     def __convert_name_to_player(self, player_name):
         """
@@ -126,40 +251,42 @@ class Gui:
         """
         main_frame = tki.Frame(parent)
         main_frame.pack(side=tki.LEFT)
-
-        board = tki.Frame(main_frame)
-        board.pack()
-        self.__create_board_cells(board)
+        self.__create_board_cells(main_frame)
 
     def __create_board_cells(self, parent):
         """
-        method that creates all cells of the board (of the gui)
+        method that creates all cells of the board (of the gui), as items of
+        one canvas. the events of the canvas are mapped to columns by their
+        x coordinate.
         """
         # cell image
         bg_img = tki.PhotoImage(file=CELL_FRAME_IMG)
-        bg_img.image = bg_img
         height = bg_img.height()
         width = bg_img.width()
+        self.__cell_width = width
 
-        # creating each cell
-        for i in range(ROWS):
-            canvas_row = []
-            for j in range(COLUMNS):
-                canvas = tki.Canvas(parent, width=width,
-                                    height=height,
-                                    highlightthickness=0, bg="LightSkyBlue2")
-                canvas.create_image(width / 2, height / 2, image=bg_img)
-                canvas.grid(row=i, column=j)
-                circle = self.__draw_circle(canvas, width / 2, height / 2,
-                                            CIRCLE_SIZE, fill="white")
-
-                canvas.bind('<1>', self.__pressed_btn(j))
-                canvas.bind('<Enter>', self.__enter_leave_circle(j, True))
-                canvas.bind('<Leave>', self.__enter_leave_circle(j, False))
-
-                canvas_row.append((canvas, circle))
+        canvas = tki.Canvas(parent, width=width * self.__cols,
+                            height=height * self.__rows,
+                            highlightthickness=0, bg="LightSkyBlue2")
+        canvas.image = bg_img
+        canvas.pack()
+        self.__canvas = canvas
 
-            self.__canvas_cells.append(canvas_row)
+        # creating each cell
+        for i in range(self.__rows):
+            circles_row = []
+            for j in range(self.__cols):
+                x = width * j + width / 2
+                y = height * i + height / 2
+                canvas.create_image(x, y, image=bg_img, tags="frame")
+                circles_row.append(self.__draw_circle(
+                    canvas, x, y, CIRCLE_SIZE, fill=EMPTY_CLR, tags="cell"))
+            self.__circles.append(circles_row)
+            self.__colors.append([EMPTY_CLR] * self.__cols)
+
+        canvas.bind('<1>', self.__pressed_btn)
+        canvas.bind('<Motion>', self.__mouse_move)
+        canvas.bind('<Leave>', self.__mouse_leave)
 
     def __init_labels(self, parent):
         """
@@ -214,24 +341,18 @@ class Gui:
         photo_lbl.image = logo
         photo_lbl.pack(side=tki.TOP, expand='yes')
 
-    def __pressed_btn(self, col):
+    def __pressed_btn(self, event):
         """
-        method that defines the functionality of the buttons on the board.
-        :return: functionality of the buttons
+        method that is called on a click on the board, and makes the move of
+        the user in the clicked column.
         """
-
-        def btn_click(event=None):
-            """
-            function that is related to each btn.
-            """
-            player = self.__get_current_player()
-            # play only if this is a user turn.
-            if player.get_type() == AI_TYPE or \
-                    self.__game.get_winner() is not None:
-                return
-            self.__make_move(player, col)
-
-        return btn_click
+        col = self.__get_col(event)
+        player = self.__get_current_player()
+        # play only if this is a user turn.
+        if col is None or player.get_type() == AI_TYPE or \
+                self.__game.get_winner() is not None:
+            return
+        self.__make_move(player, col)
 
     def __make_move(self, player, col):
         """
@@ -239,14 +360,14 @@ class Gui:
         :param player: player that made the move.
         :param col: column( the move)
         """
+        if self.__closed:
+            return
+        self.__stop_pondering()
         try:
-            if player.get_type() == AI_TYPE:
-                self.__parent.update()
-                time.sleep(AI_DELAY)
-
             self.__game.make_move(col)
             row, column = self.__game.get_last_move()
             self.__change_circle_color(row, column, player.get_color())
+            self.__show_hover()
 
             # check if the game is over.
             if self.__game.get_winner() is not None:
@@ -254,9 +375,10 @@ class Gui:
             else:
                 self.__turn_info_lbl[
                     "text"] = PLAYER_TURN_MSG % self.__get_player_letter()
-                self.__turn_manager()
+                self.__parent.after_idle(self.__turn_manager)
         except ValueError:
             messagebox.showerror(ERROR_TITLE, ERROR_MSG)
+            self.__parent.after_idle(self.__turn_manager)
 
     def __draw_circle(self, my_canvas, x, y, r, **kwargs):
         """
@@ -274,39 +396,60 @@ class Gui:
     def __change_circle_color(self, row, col, color):
         """
         method that gets the circle's coordinates on the board and the wanted
-        color and paint it.
-        """
-        curr_canvas = self.__canvas_cells[row][col][0]
-        curr_circle = self.__canvas_cells[row][col][1]
-        curr_canvas.itemconfig(curr_circle, fill=color)
-        curr_canvas.update()
-
-    def __enter_leave_circle(self, col, is_enter):
-        """
-        method that defines the functionality of entering or leaving the
-        circle.
-        :param col: column
-        :param is_enter: bool value - True= entering, False=leave.
-        :return: function with the relevant functionality.
-        """
-
-        def func(event):
-            """
-            changes the color of the relevant cell.
-            """
-            player = self.__get_current_player()
-            if player.get_type() == AI_TYPE:
-                return
-            if is_enter:
-                color = player.get_color()
-            else:
-                color = "white"
-            col_counter = self.__game.get_column_dict()
-            row = ROWS - col_counter[col] - 1
-            if row >= 0:
-                self.__change_circle_color(row, col, color)
+        color and paint it. the canvas is redrawn by Tk when it is idle, so
+        the changes of one event are drawn together.
+        """
+        if self.__colors[row][col] != color:
+            self.__colors[row][col] = color
+            self.__canvas.itemconfigure(self.__circles[row][col], fill=color)
 
-        return func
+    def __get_col(self, event):
+        """
+        :param event: mouse event of the board canvas
+        :return: the column under the mouse, None if it is out of the board
+        """
+        col = int(event.x // self.__cell_width)
+        if 0 <= col < self.__cols:
+            return col
+        return None
+
+    def __mouse_move(self, event):
+        """
+        method that is called when the mouse moves over the board, and shows
+        the move in the column under it once it enters the column.
+        """
+        col = self.__get_col(event)
+        if col != self.__hover_col:
+            self.__hover_col = col
+            self.__show_hover()
+
+    def __mouse_leave(self, event):
+        """
+        method that is called when the mouse leaves the board.
+        """
+        self.__hover_col = None
+        self.__show_hover()
+
+    def __show_hover(self):
+        """
+        method that paints the cell that the current user would play in the
+        column under the mouse, and clears the cell that was painted before.
+        """
+        if self.__hover_cell is not None:
+            row, col = self.__hover_cell
+            if not self.__game.get_player_at(row, col):
+                self.__change_circle_color(row, col, EMPTY_CLR)
+            self.__hover_cell = None
+        player = self.__get_current_player()
+        if self.__hover_col is None or player.get_type() == AI_TYPE or \
+                self.__game.get_winner() is not None:
+            return
+        col_counter = self.__game.get_column_dict()
+        row = self.__rows - col_counter[self.__hover_col] - 1
+        if row >= 0:
+            self.__change_circle_color(row, self.__hover_col,
+                                       player.get_color())
+            self.__hover_cell = (row, self.__hover_col)
 
     def __get_player_letter(self, player_name=None):
         """
@@ -0,0 +1,202 @@
+"""
+load test of the game server. every simulated player connects, plays one
+game of random moves and disconnects:
+
+    python -m ConnectFour.load_test --players 2000 --concurrency 1000
+"""
+from ConnectFour.server import DEFAULT_HOST, DEFAULT_PORT
+from ConnectFour.Game.game import COL_SIZE, ROW_SIZE, PLAYER_A, PLAYER_B
+import argparse
+import asyncio
+import random
+import time
+
+DEFAULT_PLAYERS = 1000
+DEFAULT_CONCURRENCY = 500
+DEFAULT_AI_DEPTH = 2
+# seconds to wait for a line of the server before giving up on the game.
+READ_TIMEOUT = 60
+
+
+async def play(host, port, mode, rng, latencies, game_ids=None):
+    """
+    plays one game on the server with random moves.
+    :param mode: "ai" for a game against the AI, "pvp" for a game against
+    another simulated player.
+    :param rng: random generator of the moves
+    :param latencies: list to add the seconds of every server reply to
+    :param game_ids: for "pvp" - the future of the game id of the pair. the
+    first player of the pair starts the game and sets it, the second player
+    joins the game.
+    :return: the winner, or None if the game failed
+    """
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        return None
+    try:
+        if mode == "ai":
+            writer.write(b"NEW AI %d\n" % DEFAULT_AI_DEPTH)
+        elif not game_ids.done():
+            writer.write(b"NEW PVP\n")
+        else:
+            writer.write(b"JOIN %d\n" % game_ids.result())
+        await writer.drain()
+
+        heights = [0] * COL_SIZE
+        me = None
+        current = PLAYER_A
+        sent = None
+        while True:
+            line = await asyncio.wait_for(reader.readline(), READ_TIMEOUT)
+            words = line.decode("ascii").split()
+            if not words or words[0] == "ERROR":
+                return None
+            if words[0] == "GAME":
+                me = int(words[3])
+                if game_ids is not None and me == PLAYER_A:
+                    game_ids.set_result(int(words[1]))
+                continue
+            if words[0] == "OVER":
+                return int(words[1])
+            if words[0] == "MOVED":
+                player, col = int(words[1]), int(words[2])
+                heights[col] += 1
+                current = PLAYER_B if player == PLAYER_A else PLAYER_A
+                if player != me and sent is not None:
+                    latencies.append(time.perf_counter() - sent)
+                    sent = None
+            legal = [c for c in range(COL_SIZE) if heights[c] < ROW_SIZE]
+            # a full board is followed by the OVER line
+            if current == me and legal:
+                col = rng.choice(legal)
+                writer.write(b"MOVE %d\n" % col)
+                await writer.drain()
+                sent = time.perf_counter()
+                current = None
+    except (asyncio.TimeoutError, OSError):
+        return None
+    finally:
+        writer.close()
+
+
+async def run(players, concurrency, mode, host=DEFAULT_HOST,
+              port=DEFAULT_PORT, seed=None):
+    """
+    plays the given number of simulated players against the server.
+    :param concurrency: number of players that are connected at once
+    :return: dict of the results
+    """
+    rng = random.Random(seed)
+    latencies = []
+    if mode == "pvp":
+        # the two players of a game are connected together
+        concurrency = max(1, concurrency // 2)
+    connected = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def player():
+        async with connected:
+            await _record(results, [play(host, port, mode, rng, latencies)])
+
+    start = time.perf_counter()
+    tasks = []
+    for i in range(players):
+        if mode == "ai":
+            tasks.append(player())
+        elif i % 2 == 0:
+            game_ids = asyncio.get_running_loop().create_future()
+            tasks.append(_pair(connected, host, port, rng, latencies,
+                               game_ids, results))
+    await asyncio.gather(*tasks, return_exceptions=True)
+    seconds = time.perf_counter() - start
+
+    latencies.sort()
+    failed = results.count(None)
+    games = len(results) - failed
+    if mode == "pvp":
+        games //= 2
+    summary = {"players": len(results), "failed": failed, "games": games,
+               "seconds": round(seconds, 3),
+               "games_per_second": round(games / seconds, 1)}
+    if latencies:
+        summary.update({
+            "moves": len(latencies),
+            "p50_ms": round(_percentile(latencies, 0.5) * 1000, 2),
+            "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2)})
+    return summary
+
+
+async def _record(results, players):
+    """
+    plays the given simulated players together, and adds their results to
+    the results. a player that raised is counted as a failed game.
+    :param players: list of play coroutines
+    """
+    for result in await asyncio.gather(*players, return_exceptions=True):
+        results.append(None if isinstance(result, Exception) else result)
+
+
+async def _pair(connected, host, port, rng, latencies, game_ids, results):
+    """
+    plays the two simulated players of one PVP game.
+    """
+    async with connected:
+        await _record(results, [
+            _start(host, port, rng, latencies, game_ids),
+            _join(host, port, rng, latencies, game_ids)])
+
+
+async def _start(host, port, rng, latencies, game_ids):
+    """
+    plays the first player of a PVP game. if the game was not started, the
+    second player fails at once instead of waiting for it.
+    """
+    try:
+        return await play(host, port, "pvp", rng, latencies, game_ids)
+    finally:
+        if not game_ids.done():
+            game_ids.set_exception(ConnectionError("The game was not "
+                                                   "started."))
+
+
+async def _join(host, port, rng, latencies, game_ids):
+    """
+    plays the second player of a PVP game once the game is started.
+    """
+    await asyncio.wait_for(asyncio.shield(game_ids), READ_TIMEOUT)
+    return await play(host, port, "pvp", rng, latencies, game_ids)
+
+
+def _percentile(values, rate):
+    """
+    :param values: sorted list
+    :return: the value at the given rate of the list
+    """
+    return values[min(len(values) - 1, int(len(values) * rate))]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load test of the connect four game server.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--players", type=int, default=DEFAULT_PLAYERS,
+                        help="number of simulated players")
+    parser.add_argument("--concurrency", type=int,
+                        default=DEFAULT_CONCURRENCY,
+                        help="number of players that are connected at once")
+    parser.add_argument("--mode", choices=("ai", "pvp"), default="ai",
+                        help="play against the AI or against each other")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    summary = asyncio.run(run(args.players, args.concurrency, args.mode,
+                              args.host, args.port, args.seed))
+    for name, value in summary.items():
+        print("%s: %s" % (name, value))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+from ConnectFour.Game.ai_player import AI, DEFAULT_DEPTH
+from ConnectFour.Game.game import Game, COL_SIZE, ROW_SIZE, TIE_RESULT, \
+    PLAYER_A, PLAYER_B, WIN_SEQUENCE
+from ConnectFour.Game.opening_book import OpeningBook
+import argparse
+import json
+import multiprocessing
+import random
+import time
+
+DEFAULT_GAMES = 100
+DEFAULT_OPENING = 2
+CHUNK_SIZE = 4
+
+# opening books of this worker process, by path. a book is memory-mapped
+# once per process and shared by all the games that use it.
+_books = {}
+
+
+def play_game(task):
+    """
+    plays one AI vs AI game. the first moves are random, so that the games
+    of a batch differ.
+    :param task: tuple of the game index, the seed of the random moves,
+    the number of random moves, a dict of AI settings (depth, timeout
+    in milliseconds and book path) for each player, and the rows, columns
+    and win length of the board.
+    :return: dict of the game index, winner, list of the moves (columns) and
+    list of the time of every move in milliseconds.
+    """
+    index, seed, opening, settings, size = task
+    rand = random.Random(seed)
+    game = Game(*size)
+    rows, cols = game.get_size()
+    moves = []
+    times = []
+    for i in range(opening):
+        if game.get_winner() is not None:
+            break
+        col = rand.choice([col for col in range(cols) if
+                           game.get_column_dict()[col] < rows])
+        game.make_move(col)
+        moves.append(col)
+        times.append(0.0)
+
+    ais = {}
+    for player in (PLAYER_A, PLAYER_B):
+        player_settings = settings[player]
+        book = None
+        if player_settings.get("book"):
+            book = _get_book(player_settings["book"])
+        ais[player] = AI(game, player,
+                         player_settings.get("depth", DEFAULT_DEPTH),
+                         book=book)
+
+    while game.get_winner() is None:
+        player = game.get_current_player()
+        start = time.perf_counter()
+        col = ais[player].find_legal_move(settings[player].get("timeout"))
+        times.append(round((time.perf_counter() - start) * 1000, 3))
+        game.make_move(col)
+        moves.append(col)
+
+    return {"game": index, "winner": game.get_winner(), "moves": moves,
+            "times": times}
+
+
+def run(games, out_path, settings_a, settings_b, processes=None,
+        opening=DEFAULT_OPENING, seed=None,
+        size=(ROW_SIZE, COL_SIZE, WIN_SEQUENCE)):
+    """
+    plays a batch of AI vs AI games over a pool of processes, and writes the
+    result of every game as a json line as soon as it ends.
+    :param games: number of games
+    :param out_path: path of the jsonl output file
+    :param settings_a: dict of AI settings of player A
+    :param settings_b: dict of AI settings of player B
+    :param processes: number of processes, None for one per core
+    :param opening: number of random moves at the start of every game
+    :param seed: seed of the random moves, None for a random seed
+    :param size: tuple of the rows, columns and win length of the board
+    :return: dict of the number of wins of each player and the ties
+    """
+    rand = random.Random(seed)
+    settings = {PLAYER_A: settings_a, PLAYER_B: settings_b}
+    tasks = ((i, rand.getrandbits(64), opening, settings, size)
+             for i in range(games))
+    summary = {PLAYER_A: 0, PLAYER_B: 0, TIE_RESULT: 0}
+    with multiprocessing.Pool(processes) as pool, \
+            open(out_path, "w") as out_file:
+        for result in pool.imap_unordered(play_game, tasks, CHUNK_SIZE):
+            summary[result["winner"]] += 1
+            out_file.write(json.dumps(result) + "\n")
+            out_file.flush()
+    return summary
+
+
+def _get_book(path):
+    """
+    returns the opening book of the given path, opens it on first use.
+    """
+    if path not in _books:
+        _books[path] = OpeningBook(path)
+    return _books[path]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play a batch of AI vs AI connect four games.")
+    parser.add_argument("out", help="jsonl file to write the results to")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES)
+    parser.add_argument("--processes", type=int, default=None,
+                        help="number of processes (default: one per core)")
+    parser.add_argument("--opening", type=int, default=DEFAULT_OPENING,
+                        help="number of random moves at the start")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--rows", type=int, default=ROW_SIZE)
+    parser.add_argument("--cols", type=int, default=COL_SIZE)
+    parser.add_argument("--connect", type=int, default=WIN_SEQUENCE,
+                        help="length of a winning sequence")
+    for name in ("a", "b"):
+        parser.add_argument("--depth-" + name, type=int,
+                            default=DEFAULT_DEPTH)
+        parser.add_argument("--timeout-" + name, type=int, default=None,
+                            help="milliseconds per move")
+        parser.add_argument("--book-" + name, default=None,
+                            help="opening book file")
+    args = parser.parse_args()
+
+    settings_a = {"depth": args.depth_a, "timeout": args.timeout_a,
+                  "book": args.book_a}
+    settings_b = {"depth": args.depth_b, "timeout": args.timeout_b,
+                  "book": args.book_b}
+    start = time.perf_counter()
+    summary = run(args.games, args.out, settings_a, settings_b,
+                  args.processes, args.opening, args.seed,
+                  (args.rows, args.cols, args.connect))
+    print("A wins: %d, B wins: %d, ties: %d (%.1f seconds)" % (
+        summary[PLAYER_A], summary[PLAYER_B], summary[TIE_RESULT],
+        time.perf_counter() - start))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,472 @@
+"""
+asyncio server that hosts many concurrent games over a line protocol on TCP.
+every client plays one game at a time. client lines:
+
+    NEW AI [depth]   start a game against the AI, the client is player 1
+    NEW PVP          start a game against another client, the client is
+                     player 1. the reply tells the game id to join.
+    JOIN <id>        join a PVP game as player 2
+    MOVE <col>       make a move in the client's game
+    QUIT             leave the game and close the connection
+
+server lines:
+
+    GAME <id> PLAYER <player>   the client joined a game
+    START                       both players are in, player 1 moves first
+    MOVED <player> <col>        a move was made in the client's game
+    OVER <winner>               the game is over (0 for a tie)
+    ERROR <message>
+
+AI moves are searched in a process pool, so the event loop never waits for
+a search. the workers can share their results through a result cache (see
+ConnectFour.Game.result_cache), so positions that come again are not
+searched again. the games can be archived to a record file (see
+ConnectFour.Game.records).
+"""
+from ConnectFour.Game import result_cache
+from ConnectFour.Game.ai_player import AI
+from ConnectFour.Game.game import Game, PLAYER_A, PLAYER_B
+from ConnectFour.Game.records import RecordWriter
+import argparse
+import asyncio
+import concurrent.futures
+import itertools
+import os
+import time
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 4444
+MAX_CLIENTS = 10000
+# seconds that a client or a game can stay without a move.
+IDLE_TIMEOUT = 300
+# seconds to wait for a slow client to read what was sent to it.
+SEND_TIMEOUT = 10
+LINE_LIMIT = 256
+AI_DEPTH = 6
+MAX_AI_DEPTH = 10
+# AI searches that can wait for the pool, per worker process. more clients
+# that wait for an AI move wait before entering the pool queue.
+AI_JOBS_PER_WORKER = 4
+
+
+def ai_move(moves, player, depth):
+    """
+    finds the AI move of a game, in a worker process.
+    :param moves: the moves (columns) that were made in the game
+    :param player: the AI player
+    :param depth: search depth
+    :return: tuple of the move (as column), and whether it was found in the
+    result cache of the worker
+    """
+    game = Game()
+    for move in moves:
+        game.make_move(move)
+    cache = result_cache.get_cache()
+    hits = cache.get_stats()["hits"] if cache is not None else 0
+    col = AI(game, player, depth).find_legal_move()
+    return col, cache is not None and cache.get_stats()["hits"] > hits
+
+
+class Session:
+    """
+    class that defines one game of the server and its players.
+    """
+
+    def __init__(self, session_id, ai_depth=None):
+        """
+        constructor of session object.
+        :param session_id: game id
+        :param ai_depth: search depth of the AI player, None for a game of
+        two clients.
+        """
+        self.__id = session_id
+        self.__game = Game()
+        self.__ai_depth = ai_depth
+        self.__writers = {}
+        self.__last_active = time.monotonic()
+
+    def get_id(self):
+        return self.__id
+
+    def get_game(self):
+        return self.__game
+
+    def get_ai_depth(self):
+        return self.__ai_depth
+
+    def get_ai_player(self):
+        """
+        :return: the player of the AI, None if there is no AI player
+        """
+        if self.__ai_depth is not None:
+            return PLAYER_B
+
+    def get_writers(self):
+        """
+        :return: list of the stream writers of the clients of the game
+        """
+        return list(self.__writers.values())
+
+    def add_player(self, player, writer):
+        self.__writers[player] = writer
+
+    def remove_player(self, player):
+        self.__writers.pop(player, None)
+
+    def has_player(self, player):
+        return player in self.__writers
+
+    def is_empty(self):
+        return not self.__writers
+
+    def touch(self):
+        """
+        marks the session as active now.
+        """
+        self.__last_active = time.monotonic()
+
+    def get_idle_time(self):
+        """
+        :return: seconds since the last activity
+        """
+        return time.monotonic() - self.__last_active
+
+
+class GameServer:
+    """
+    class that defines the game server.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None,
+                 max_clients=MAX_CLIENTS, idle_timeout=IDLE_TIMEOUT,
+                 record_path=None, cache=None):
+        """
+        constructor of the server.
+        :param workers: number of AI processes, None for one per core
+        :param max_clients: number of connections that are served at once,
+        more connections are refused.
+        :param idle_timeout: seconds that a client or a game can stay
+        without a move.
+        :param record_path: record file to add every game that had a move
+        to when it ends, None to keep no records.
+        :param cache: tuple of the size, ttl and spill file path of the
+        result cache of every AI process (see ResultCache), None for no
+        cache.
+        """
+        self.__host = host
+        self.__port = port
+        self.__workers = workers or os.cpu_count()
+        self.__max_clients = max_clients
+        self.__idle_timeout = idle_timeout
+        self.__sessions = {}
+        self.__ids = itertools.count(1)
+        self.__clients = 0
+        self.__pool = None
+        self.__ai_jobs = None
+        self.__server = None
+        self.__record_path = record_path
+        self.__records = None
+        self.__cache = cache
+        self.__ai_moves = 0
+        self.__cache_hits = 0
+
+    # public methods
+    async def start(self):
+        """
+        starts listening. must be called from a running event loop.
+        """
+        if self.__cache is None:
+            self.__pool = concurrent.futures.ProcessPoolExecutor(
+                self.__workers)
+        else:
+            self.__pool = concurrent.futures.ProcessPoolExecutor(
+                self.__workers, initializer=result_cache.configure,
+                initargs=self.__cache)
+        if self.__record_path is not None:
+            self.__records = RecordWriter(self.__record_path, append=True)
+        self.__ai_jobs = asyncio.Semaphore(self.__workers *
+                                           AI_JOBS_PER_WORKER)
+        self.__server = await asyncio.start_server(
+            self.__handle_client, self.__host, self.__port, limit=LINE_LIMIT)
+        asyncio.get_running_loop().create_task(self.__expire_sessions())
+
+    async def serve_forever(self):
+        """
+        starts the server and serves until it is cancelled.
+        """
+        await self.start()
+        try:
+            async with self.__server:
+                await self.__server.serve_forever()
+        finally:
+            self.__pool.shutdown(cancel_futures=True)
+            if self.__records is not None:
+                self.__records.close()
+
+    def get_address(self):
+        """
+        :return: (host, port) that the server listens on
+        """
+        return self.__server.sockets[0].getsockname()[:2]
+
+    def get_stats(self):
+        """
+        :return: dict of the number of connected clients, open games, AI
+        moves, and AI moves that were found in the result cache
+        """
+        return {"clients": self.__clients, "games": len(self.__sessions),
+                "ai_moves": self.__ai_moves, "cache_hits": self.__cache_hits}
+
+    # private methods
+    async def __handle_client(self, reader, writer):
+        """
+        serves one client connection until it is closed.
+        """
+        if self.__clients >= self.__max_clients:
+            await self.__send(writer, "ERROR server is full")
+            writer.close()
+            return
+        self.__clients += 1
+        # the game and the player of the client
+        client = {"session": None, "player": None}
+        try:
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(),
+                                                  self.__idle_timeout)
+                except asyncio.TimeoutError:
+                    await self.__send(writer, "ERROR timeout")
+                    break
+                except ValueError:  # the line is longer than the limit
+                    await self.__send(writer, "ERROR line too long")
+                    break
+                if not line:
+                    break
+                words = line.decode("ascii", "replace").split()
+                if words and words[0].upper() == "QUIT":
+                    break
+                if words:
+                    await self.__handle_line(writer, client, words)
+        except ConnectionError:
+            pass
+        finally:
+            self.__clients -= 1
+            self.__leave(client)
+            writer.close()
+
+    async def __handle_line(self, writer, client, words):
+        """
+        handles one line of a client.
+        """
+        command = words[0].upper()
+        if command == "NEW" and len(words) >= 2:
+            await self.__new_game(writer, client, words[1:])
+        elif command == "JOIN" and len(words) == 2:
+            await self.__join(writer, client, words[1])
+        elif command == "MOVE" and len(words) == 2:
+            await self.__move(writer, client, words[1])
+        else:
+            await self.__send(writer, "ERROR unknown command")
+
+    async def __new_game(self, writer, client, args):
+        """
+        starts a new game of the client.
+        """
+        mode = args[0].upper()
+        ai_depth = None
+        if mode == "AI":
+            ai_depth = AI_DEPTH
+            if len(args) > 1:
+                if not args[1].isdigit():
+                    await self.__send(writer, "ERROR illegal depth")
+                    return
+                ai_depth = max(1, min(int(args[1]), MAX_AI_DEPTH))
+        elif mode != "PVP":
+            await self.__send(writer, "ERROR unknown game type")
+            return
+        self.__leave(client)
+        session = Session(next(self.__ids), ai_depth)
+        session.add_player(PLAYER_A, writer)
+        self.__sessions[session.get_id()] = session
+        client["session"], client["player"] = session, PLAYER_A
+        await self.__send(writer, "GAME %d PLAYER %d" % (session.get_id(),
+                                                         PLAYER_A))
+        if ai_depth is not None:
+            await self.__send(writer, "START")
+
+    async def __join(self, writer, client, session_id):
+        """
+        adds the client to a game that waits for a second player.
+        """
+        session = None
+        if session_id.isdigit():
+            session = self.__sessions.get(int(session_id))
+        if (session is None or session.get_ai_player() is not None or
+                session.has_player(PLAYER_B)):
+            await self.__send(writer, "ERROR no such game")
+            return
+        self.__leave(client)
+        session.add_player(PLAYER_B, writer)
+        session.touch()
+        client["session"], client["player"] = session, PLAYER_B
+        await self.__send(writer, "GAME %d PLAYER %d" % (session.get_id(),
+                                                         PLAYER_B))
+        await self.__broadcast(session, "START")
+
+    async def __move(self, writer, client, col):
+        """
+        makes a move of the client, and the AI reply if the game has an AI
+        player.
+        """
+        session = client["session"]
+        # the game may have ended, timed out or lost the other player
+        if session is None or \
+                self.__sessions.get(session.get_id()) is not session:
+            await self.__send(writer, "ERROR no game")
+            return
+        game = session.get_game()
+        if game.get_current_player() != client["player"] or \
+                (session.get_ai_player() is None and
+                 not session.has_player(PLAYER_B)):
+            await self.__send(writer, "ERROR not your turn")
+            return
+        if not await self.__play(session, col):
+            await self.__send(writer, "ERROR illegal move")
+            return
+        if session.get_ai_player() is not None and \
+                self.__sessions.get(session.get_id()) is session:
+            loop = asyncio.get_running_loop()
+            async with self.__ai_jobs:
+                ai_col, cached = await loop.run_in_executor(
+                    self.__pool, ai_move, game.get_moves(),
+                    session.get_ai_player(), session.get_ai_depth())
+            self.__ai_moves += 1
+            self.__cache_hits += cached
+            # the client may have left while the AI was searching
+            if self.__sessions.get(session.get_id()) is session:
+                await self.__play(session, ai_col)
+
+    async def __play(self, session, col):
+        """
+        makes a move in the game of the session and tells its players.
+        :param col: the column, as given by the client or as int
+        :return: True if the move was made, False if it is illegal.
+        """
+        game = session.get_game()
+        player = game.get_current_player()
+        try:
+            col = int(col)
+            game.make_move(col)
+        except ValueError:
+            return False
+        session.touch()
+        lines = ["MOVED %d %d" % (player, col)]
+        winner = game.get_winner()
+        if winner is not None:
+            # closed before the lines are sent, so no move can get in
+            # between them.
+            lines.append("OVER %d" % winner)
+            self.__end(session)
+        await self.__broadcast(session, *lines)
+        return True
+
+    def __leave(self, client):
+        """
+        removes the client from its game and closes the game.
+        """
+        session = client["session"]
+        if session is None:
+            return
+        session.remove_player(client["player"])
+        if self.__end(session):
+            for other in session.get_writers():
+                if not other.is_closing():
+                    other.write(b"ERROR the other player left\n")
+        client["session"] = client["player"] = None
+
+    def __end(self, session):
+        """
+        closes a game, and adds it to the records.
+        :return: True if the game was open
+        """
+        if self.__sessions.pop(session.get_id(), None) is None:
+            return False
+        game = session.get_game()
+        if self.__records is not None and game.get_moves():
+            self.__records.write_game(game, {
+                "mode": "pvp" if session.get_ai_player() is None else "ai",
+                "depth": session.get_ai_depth(), "time": int(time.time())})
+            # a server that is killed loses no finished game
+            self.__records.flush()
+        return True
+
+    async def __expire_sessions(self):
+        """
+        closes the games that had no move for longer than the idle timeout.
+        """
+        while True:
+            await asyncio.sleep(self.__idle_timeout / 4)
+            for session in list(self.__sessions.values()):
+                if session.get_idle_time() > self.__idle_timeout:
+                    self.__end(session)
+                    await self.__broadcast(session, "ERROR timeout")
+
+    async def __broadcast(self, session, *lines):
+        """
+        sends lines to all the clients of a game.
+        """
+        for writer in session.get_writers():
+            await self.__send(writer, *lines)
+
+    async def __send(self, writer, *lines):
+        """
+        sends lines to a client, and waits while the client is slow to read
+        them. a client that does not read at all is disconnected.
+        """
+        if writer.is_closing():
+            return
+        writer.write("".join(line + "\n" for line in lines).encode("ascii"))
+        try:
+            await asyncio.wait_for(writer.drain(), SEND_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError):
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Connect four game server.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of AI processes (default: one per "
+                             "core)")
+    parser.add_argument("--max-clients", type=int, default=MAX_CLIENTS)
+    parser.add_argument("--idle-timeout", type=float, default=IDLE_TIMEOUT,
+                        help="seconds without a move before a game is "
+                             "closed")
+    parser.add_argument("--records", default=None,
+                        help="record file to archive the games to")
+    parser.add_argument("--cache-size", type=int, default=None,
+                        help="AI results cached by every AI process "
+                             "(default: %d if the cache is on)"
+                             % result_cache.DEFAULT_SIZE)
+    parser.add_argument("--cache-ttl", type=float, default=None,
+                        help="seconds that a cached AI result is kept")
+    parser.add_argument("--cache-file", default=None,
+                        help="sqlite file that keeps the cached AI results "
+                             "between restarts")
+    args = parser.parse_args()
+    cache = None
+    if (args.cache_size is not None or args.cache_ttl is not None or
+            args.cache_file is not None):
+        cache = (args.cache_size or result_cache.DEFAULT_SIZE,
+                 args.cache_ttl, args.cache_file)
+    server = GameServer(args.host, args.port, args.workers, args.max_clients,
+                        args.idle_timeout, args.records, cache)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
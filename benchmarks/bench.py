@@ -0,0 +1,261 @@
+"""
+benchmarks of the start up, the board, the win detection, the AI search and
+the endgame solver.
+run from the repository root:
+
+    python -m benchmarks.bench --out results.json
+    python -m benchmarks.bench --baseline results.json
+
+every result is a number where higher is better (operations per second)
+or lower is better (latency), and a run can be compared to a saved
+baseline run, flagging the results that got worse by more than a given
+threshold.
+"""
+from ConnectFour.Game.ai_player import AI
+from ConnectFour.Game.bit_board import BitBoard
+from ConnectFour.Game.board import Board
+from ConnectFour.Game.game import Game, ROW_SIZE, COL_SIZE
+from ConnectFour.Game.solver import Solver
+from ConnectFour.Game.win_detector import WinDetector, WIN_SEQUENCE
+from benchmarks.positions import POSITION_SETS, to_moves
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+DEPTHS = (4, 6, 8)
+# board variants (rows, columns, win length) that the search is measured on,
+# with the position sets that are legal games on them.
+VARIANTS = {"8x9_connect5": (8, 9, 5)}
+VARIANT_SETS = ("opening", "midgame")
+# position sets that are measured with the endgame solver.
+SOLVER_SETS = ("near_full",)
+MIN_DURATION = 0.5
+# modules that a new process imports, measured from the start of the
+# interpreter. None is the interpreter alone.
+STARTUP_MODULES = {"startup.python": None,
+                   "startup.engine": "ConnectFour.Game.ai_player",
+                   "startup.app": "connect_four"}
+STARTUP_RUNS = 10
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_THRESHOLD = 0.1
+# suffixes of the results where lower is better.
+LOWER_IS_BETTER = ("_ms", "nodes")
+
+
+def bench_startup(module):
+    """
+    measures the start of a new process that imports the given module, like
+    a spawned worker. the import must not load Tk, otherwise raises
+    subprocess.CalledProcessError.
+    :param module: module name, None for the interpreter alone
+    :return: dict of the median and maximum latency in milliseconds
+    """
+    code = "pass"
+    if module is not None:
+        code = "import sys, %s; sys.exit('tkinter' in sys.modules)" % module
+    latencies = []
+    for _ in range(STARTUP_RUNS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR,
+                       check=True)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    return {"p50_ms": _percentile(latencies, 50) * 1000,
+            "max_ms": latencies[-1] * 1000}
+
+
+def bench_make_move(board_class):
+    """
+    measures the make_move calls per second of the given board class, by
+    filling empty boards column by column.
+    :return: calls per second
+    """
+    cells = [(row, col) for col in range(COL_SIZE)
+             for row in range(ROW_SIZE - 1, -1, -1)]
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < MIN_DURATION:
+        board = board_class(ROW_SIZE, COL_SIZE)
+        for row, col in cells:
+            board.make_move(row, col, 1 + (calls & 1))
+            calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def bench_is_won(board_class):
+    """
+    measures the WinDetector.is_won calls per second on the given board
+    class, for the last move of every benchmark position.
+    :return: calls per second
+    """
+    checks = []
+    for positions in POSITION_SETS.values():
+        for position in positions:
+            board = board_class(ROW_SIZE, COL_SIZE)
+            heights = [0] * COL_SIZE
+            player = 1
+            for col in to_moves(position):
+                row = ROW_SIZE - 1 - heights[col]
+                board.make_move(row, col, player)
+                heights[col] += 1
+                player = 3 - player
+            checks.append((WinDetector(board), (row, col), 3 - player))
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < MIN_DURATION:
+        for detector, last_move, player in checks:
+            detector.is_won(last_move, player)
+        calls += len(checks)
+    return calls / (time.perf_counter() - start)
+
+
+def bench_search(positions, depth, size=(ROW_SIZE, COL_SIZE, WIN_SEQUENCE)):
+    """
+    measures AI.find_legal_move on the given positions, with a new AI for
+    every search. the AI never hands the position to the endgame solver
+    (see bench_solve), so every position is searched.
+    :param size: tuple of the rows, columns and win length of the board
+    :return: dict of the visited positions per second, their number (that
+    changes only when the search does), and the median, 90th percentile and
+    maximum latency in milliseconds.
+    """
+    nodes = 0
+    latencies = []
+    for position in positions:
+        game = Game(*size)
+        for col in to_moves(position):
+            game.make_move(col)
+        ai = AI(game, game.get_current_player(), depth, solver_threshold=0)
+        start = time.perf_counter()
+        ai.find_legal_move()
+        latencies.append(time.perf_counter() - start)
+        nodes += ai.get_last_search_nodes()
+    latencies.sort()
+    return {"nodes_per_sec": nodes / sum(latencies), "nodes": nodes,
+            "p50_ms": _percentile(latencies, 50) * 1000,
+            "p90_ms": _percentile(latencies, 90) * 1000,
+            "max_ms": latencies[-1] * 1000}
+
+
+def bench_solve(positions):
+    """
+    measures Solver.solve_moves on the given positions, with a new solver
+    for every position.
+    :return: dict of the solved positions per second, their number (that
+    changes only when the solver does), and the median, 90th percentile and
+    maximum latency in milliseconds.
+    """
+    nodes = 0
+    latencies = []
+    for position in positions:
+        game = Game()
+        for col in to_moves(position):
+            game.make_move(col)
+        solver = Solver(ROW_SIZE, COL_SIZE)
+        start = time.perf_counter()
+        solver.solve_moves(game.get_board(), game.get_current_player())
+        latencies.append(time.perf_counter() - start)
+        nodes += solver.get_nodes()
+    latencies.sort()
+    return {"nodes_per_sec": nodes / sum(latencies), "nodes": nodes,
+            "p50_ms": _percentile(latencies, 50) * 1000,
+            "p90_ms": _percentile(latencies, 90) * 1000,
+            "max_ms": latencies[-1] * 1000}
+
+
+def run(depths=DEPTHS):
+    """
+    runs all the benchmarks.
+    :return: dict of benchmark name to its results
+    """
+    results = {name: bench_startup(module)
+               for name, module in STARTUP_MODULES.items()}
+    results.update({
+        "board.make_move": {"calls_per_sec": bench_make_move(Board)},
+        "bit_board.make_move": {"calls_per_sec": bench_make_move(BitBoard)},
+        "win_detector.board": {"calls_per_sec": bench_is_won(Board)},
+        "win_detector.bit_board": {"calls_per_sec": bench_is_won(BitBoard)},
+    })
+    for name, positions in POSITION_SETS.items():
+        for depth in depths:
+            results["search.%s.depth_%d" % (name, depth)] = bench_search(
+                positions, depth)
+    for variant, size in VARIANTS.items():
+        for name in VARIANT_SETS:
+            for depth in depths:
+                results["search.%s.%s.depth_%d" % (variant, name, depth)] = \
+                    bench_search(POSITION_SETS[name], depth, size)
+    for name in SOLVER_SETS:
+        results["solver.%s" % name] = bench_solve(POSITION_SETS[name])
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    compares results to baseline results.
+    :param threshold: the relative change that counts as a regression. a
+    result that fell to 0 is always a regression - the benchmark no longer
+    measures anything.
+    :return: list of (benchmark, metric, baseline value, value) of the
+    regressions
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            base = baseline.get(name, {}).get(metric)
+            if not base:
+                continue
+            if not value:
+                regressions.append((name, metric, base, value))
+                continue
+            change = (value - base) / base
+            if metric.endswith(LOWER_IS_BETTER):
+                change = -change
+            if change < -threshold:
+                regressions.append((name, metric, base, value))
+    return regressions
+
+
+def _percentile(values, percent):
+    """
+    :param values: sorted list
+    :return: the value at the given percentile (nearest rank)
+    """
+    idx = max(0, -(-len(values) * percent // 100) - 1)
+    return values[idx]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Connect four benchmarks.")
+    parser.add_argument("--out", help="json file to save the results to")
+    parser.add_argument("--baseline", help="json file of results to compare "
+                                           "to")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative change that counts as a regression")
+    parser.add_argument("--depths", type=int, nargs="+", default=DEPTHS)
+    args = parser.parse_args()
+
+    results = run(args.depths)
+    for name, metrics in results.items():
+        print("%-32s %s" % (name, ", ".join(
+            "%s=%.1f" % (metric, value) for metric, value in
+            metrics.items())))
+    if args.out:
+        with open(args.out, "w") as out_file:
+            json.dump(results, out_file, indent=2, sort_keys=True)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, base, value in regressions:
+            print("REGRESSION %s %s: %.1f -> %.1f" % (name, metric, base,
+                                                      value))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""
+fixed positions for the benchmarks. every position is the string of the
+columns that were played from the empty board.
+"""
+
+OPENING = ["2135", "0064", "0240", "4100"]
+
+# none of the positions can be won with the next move, so every search
+# goes past its first depth.
+MIDGAME = ["0244560144436456", "0520442231555420", "3466363450622360",
+           "4611040642565210"]
+
+NEAR_FULL = ["4531132020615436011615432255334206",
+             "0312211213301102400405645444365255",
+             "0651143254211510362314020543500432",
+             "4106010264552560331044560113245616"]
+
+# the player that its his turn can force a win within a few moves.
+FORCED_WIN = ["242443602166066250", "0450511600133660360323",
+              "6305303666162605503203", "6555551502431036320006"]
+
+POSITION_SETS = {"opening": OPENING, "midgame": MIDGAME,
+                 "near_full": NEAR_FULL, "forced_win": FORCED_WIN}
+
+
+def to_moves(position):
+    """
+    :param position: string of columns
+    :return: list of columns
+    """
+    return [int(col) for col in position]
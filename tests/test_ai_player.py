@@ -0,0 +1,79 @@
+import threading
+import unittest
+
+from ConnectFour.Game.ai_player import AI
+from ConnectFour.Game.evaluator import max_score
+from ConnectFour.Game.game import Game, PLAYER_A
+
+# endgames that the AI loses, wins, draws and wins, as the columns that were
+# played from the empty board.
+ENDGAMES = ["4531132020615436011615432255334206",
+            "031221121330110240040564544436",
+            "0651143254211510362314020543500432",
+            "410601026455256033104456011324"]
+
+
+def play(moves):
+    """
+    :param moves: list of columns
+    :return: game object after the given moves
+    """
+    game = Game()
+    for col in moves:
+        game.make_move(col)
+    return game
+
+
+class AITest(unittest.TestCase):
+
+    def test_blocks_threat_mid_game(self):
+        # the AI is created after the moves, so it copies a board that has
+        # disks on it.
+        game = play([0, 6, 0, 6, 0])
+        ai = AI(game, game.get_current_player())
+        self.assertEqual(ai.find_legal_move(), 0)
+
+    def test_pondered_search_used_under_timeout(self):
+        game = play([3])
+        ai = AI(game, PLAYER_A, stats=True)
+        # the replies are searched to depth 6, so it returns without a stop
+        ai.ponder(threading.Event(), max_depth=6)
+        game.make_move(3)
+        # no depth can be searched in a millisecond, so a search that starts
+        # from depth 1 would end below the pondered depth.
+        ai.find_legal_move(timeout=1)
+        self.assertEqual(ai.get_last_stats().source, "ponder")
+        self.assertGreaterEqual(ai.get_last_search_depth(), 6)
+        self.assertIsNotNone(ai.get_last_score())
+
+    def test_solver_matches_negamax(self):
+        for position in ENDGAMES:
+            game = play([int(col) for col in position])
+            player = game.get_current_player()
+            rows, cols = game.get_size()
+            empty = rows * cols - len(position)
+            solver_ai = AI(game, player, depth=1, solver_threshold=empty)
+            col = solver_ai.find_legal_move()
+            # deep enough to reach the end of the game
+            search_ai = AI(game, player, depth=empty + 1, solver_threshold=0)
+            search_ai.find_legal_move()
+            self.assertEqual(solver_ai.get_last_score(),
+                             search_ai.get_last_score())
+            self.assertEqual(search_ai.rate_move(col, empty + 1),
+                             search_ai.get_last_score())
+            self.assertEqual(solver_ai.get_last_search_depth(), empty)
+            self.assertGreater(solver_ai.get_last_search_nodes(), 0)
+
+    def test_wins_score_above_ratings(self):
+        # the evaluator rates boards of this size higher than SURE_WIN
+        game = Game(8, 9, 5)
+        for col in [0, 8, 1, 8, 2, 8, 3, 8]:
+            game.make_move(col)
+        ai = AI(game, PLAYER_A, depth=4, solver_threshold=0)
+        self.assertEqual(ai.find_legal_move(), 4)
+        self.assertGreater(ai.get_last_score(), max_score(8, 9, 5))
+        self.assertEqual(ai.get_last_search_depth(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import itertools
+import os
+import tempfile
+import unittest
+
+from ConnectFour.Game.ai_player import AI
+from ConnectFour.Game.game import Game, COL_SIZE
+from ConnectFour.Game.opening_book import OpeningBook, build_book
+
+PLIES = 1
+DEPTH = 6
+
+
+class OpeningBookTest(unittest.TestCase):
+
+    def test_book_moves_match_search(self):
+        # equally rated moves may be chosen differently, so the book move
+        # must score as well as the move of a new search.
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "book.c4b")
+            build_book(path, PLIES, DEPTH)
+            book = OpeningBook(path)
+            try:
+                for plies in range(PLIES + 1):
+                    for moves in itertools.product(range(COL_SIZE),
+                                                   repeat=plies):
+                        self.__check_position(book, moves)
+            finally:
+                book.close()
+
+    def __check_position(self, book, moves):
+        game = Game()
+        for col in moves:
+            game.make_move(col)
+        player = game.get_current_player()
+        book_move = book.get_move(game.get_board(), player)
+        self.assertIsNotNone(book_move, moves)
+        ai = AI(game, player, DEPTH)
+        ai.find_legal_move()
+        book_score = AI(game, player, DEPTH).rate_move(book_move, DEPTH)
+        self.assertEqual(book_score, ai.get_last_score(), moves)
+
+
+if __name__ == '__main__':
+    unittest.main()
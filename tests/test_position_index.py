@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+
+from ConnectFour.Game.game import Game, COL_SIZE, TIE_RESULT, PLAYER_A
+from ConnectFour.Game.position_index import PositionIndex, build_index, \
+    record_struct
+from ConnectFour.Game.records import RecordWriter
+
+# the second game is the mirror image of the first, and the last one is a
+# tie that starts in the first column.
+GAMES = [([2, 1, 2, 1, 2, 1, 2], PLAYER_A),
+         ([4, 5, 4, 5, 4, 5, 4], PLAYER_A),
+         ([2, 3], None),
+         ([int(col) for col in "015502320345364356222230416104501114435666"],
+          TIE_RESULT)]
+
+
+def play(moves):
+    """
+    :param moves: list of columns
+    :return: game object after the given moves
+    """
+    game = Game()
+    for col in moves:
+        game.make_move(col)
+    return game
+
+
+class PositionIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def test_lookup(self):
+        path = self.__build("index.c4x", [self.__records("games.c4r", GAMES)],
+                            chunk=3)
+        index = PositionIndex(path)
+        try:
+            self.assertEqual(self.__lookup(index, []), {
+                "games": 4, "wins": 2, "losses": 0, "draws": 1,
+                "moves": [1, 0, 2, 0, 1, 0, 0]})
+            # a position and its mirror image share their record, with the
+            # columns of the moves flipped.
+            self.assertEqual(self.__lookup(index, [2]), {
+                "games": 3, "wins": 0, "losses": 2, "draws": 0,
+                "moves": [0, 2, 0, 1, 0, 0, 0]})
+            self.assertEqual(self.__lookup(index, [4]), {
+                "games": 3, "wins": 0, "losses": 2, "draws": 0,
+                "moves": [0, 0, 0, 1, 0, 2, 0]})
+            self.assertIsNone(self.__lookup(index, [6, 6]))
+        finally:
+            index.close()
+
+    def test_runs_and_append_match_one_build(self):
+        records = self.__records("games.c4r", GAMES)
+        whole = self.__build("whole.c4x", [records])
+        runs = self.__build("runs.c4x", [records], chunk=2)
+        appended = self.__build("appended.c4x",
+                                [self.__records("first.c4r", GAMES[:2])])
+        self.__build("appended.c4x",
+                     [self.__records("second.c4r", GAMES[2:])], append=True,
+                     chunk=2)
+        self.assertEqual(self.__read(runs), self.__read(whole))
+        self.assertEqual(self.__read(appended), self.__read(whole))
+        # no run files are left behind
+        self.assertEqual(sorted(os.listdir(self.__directory.name)),
+                         ["appended.c4x", "first.c4r", "games.c4r",
+                          "runs.c4x", "second.c4r", "whole.c4x"])
+
+    def test_counts_are_64_bits(self):
+        record = record_struct(COL_SIZE)
+        values = (1 << 63, 1 << 40, 1 << 33, 0, 1) + (1 << 32,) * COL_SIZE
+        self.assertEqual(record.unpack(record.pack(*values)), values)
+
+    def __records(self, name, games):
+        path = os.path.join(self.__directory.name, name)
+        with RecordWriter(path) as writer:
+            for moves, winner in games:
+                writer.write(moves, winner)
+        return path
+
+    def __build(self, name, record_paths, **kwargs):
+        path = os.path.join(self.__directory.name, name)
+        build_index(path, record_paths, **kwargs)
+        return path
+
+    def __lookup(self, index, moves):
+        game = play(moves)
+        return index.lookup(game.get_board(), game.get_current_player())
+
+    def __read(self, path):
+        index = PositionIndex(path)
+        try:
+            return list(index)
+        finally:
+            index.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
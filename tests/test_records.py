@@ -0,0 +1,85 @@
+import os
+import random
+import tempfile
+import unittest
+
+from ConnectFour.Game.game import PLAYER_A, PLAYER_B, TIE_RESULT
+from ConnectFour.Game.records import RecordWriter, read_records, \
+    validate_records, move_bits, pack_moves, unpack_moves, MOVE_BITS
+
+# a game that the first player wins in the first column, and a full board
+# that is a tie.
+WON = [0, 1, 0, 1, 0, 1, 0]
+TIE = [int(col) for col in "015502320345364356222230416104501114435666"]
+
+
+class RecordsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__path = os.path.join(self.__directory.name, "games.c4r")
+
+    def tearDown(self):
+        self.__directory.cleanup()
+
+    def test_pack_round_trip(self):
+        rng = random.Random(0)
+        for col in (7, 8, 9, 12, 16, 17):
+            bits = move_bits(col)
+            self.assertGreaterEqual(1 << bits, col)
+            for count in (0, 1, 5, 40):
+                moves = [rng.randrange(col) for _ in range(count)]
+                data = pack_moves(moves, bits)
+                self.assertEqual(len(data), (count * bits + 7) // 8)
+                self.assertEqual(unpack_moves(data, count, bits), moves)
+        self.assertEqual(move_bits(8), MOVE_BITS)
+        self.assertGreater(move_bits(9), MOVE_BITS)
+
+    def test_write_read_round_trip(self):
+        with RecordWriter(self.__path) as writer:
+            writer.write(WON, PLAYER_A, {"mode": "ai", "depth": 8})
+            writer.write([3, 3, 4])  # unfinished
+            writer.write(TIE, TIE_RESULT)
+        self.assertEqual(list(read_records(self.__path)), [
+            (WON, PLAYER_A, {"mode": "ai", "depth": 8}),
+            ([3, 3, 4], None, None),
+            (TIE, TIE_RESULT, None)])
+        self.assertEqual(list(validate_records(self.__path)), [])
+
+    def test_wide_board_round_trip(self):
+        moves = [11, 10, 9, 8, 0, 11]
+        with RecordWriter(self.__path, 6, 12, win_length=5) as writer:
+            writer.write(moves, metadata={"cols": 12})
+        self.assertEqual(list(read_records(self.__path)),
+                         [(moves, None, {"cols": 12})])
+
+    def test_validate_records(self):
+        with RecordWriter(self.__path) as writer:
+            writer.write(WON, PLAYER_A)
+            writer.write([0] * 7)  # a full column
+            writer.write(WON + [1])  # a move after a win
+            writer.write(WON, PLAYER_B)
+            writer.write(WON)  # a won game that is unfinished
+        self.assertEqual(list(validate_records(self.__path)),
+                         [(1, "illegal move"), (2, "illegal move"),
+                          (3, "wrong winner"), (4, "wrong winner")])
+
+    def test_append(self):
+        with RecordWriter(self.__path) as writer:
+            writer.write(WON, PLAYER_A)
+        with RecordWriter(self.__path, append=True) as writer:
+            writer.write([3])
+        self.assertEqual([record[0] for record in read_records(self.__path)],
+                         [WON, [3]])
+
+    def test_append_other_header(self):
+        with RecordWriter(self.__path) as writer:
+            writer.write(WON, PLAYER_A)
+        with self.assertRaises(ValueError):
+            RecordWriter(self.__path, 8, 9, append=True, win_length=5)
+        with self.assertRaises(ValueError):
+            RecordWriter(self.__path, append=True, win_length=5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from ConnectFour.Game import result_cache
+from ConnectFour.Game.ai_player import AI
+from ConnectFour.Game.game import Game
+from ConnectFour.Game.result_cache import ResultCache
+
+DEPTH = 4
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.__directory = tempfile.TemporaryDirectory()
+        self.__path = os.path.join(self.__directory.name, "results.db")
+
+    def tearDown(self):
+        result_cache.disable()
+        self.__directory.cleanup()
+
+    def test_drops_least_recently_used(self):
+        cache = ResultCache(max_size=2)
+        cache.put("a", (1,))
+        cache.put("b", (2,))
+        self.assertEqual(cache.get("a"), (1,))  # "b" is now the oldest
+        cache.put("c", (3,))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), (1,))
+        self.assertEqual(cache.get("c"), (3,))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_expires(self):
+        cache = ResultCache(ttl=10)
+        with mock.patch("time.time", return_value=1000.0):
+            cache.put("a", (1,))
+        with mock.patch("time.time", return_value=1009.0):
+            self.assertEqual(cache.get("a"), (1,))
+        with mock.patch("time.time", return_value=1010.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get_stats()["expired"], 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_reloads_spill_file(self):
+        cache = ResultCache(path=self.__path)
+        cache.put(("key", 1), (3, 5, None, (1, 7)))
+        cache.close()
+        cache = ResultCache(path=self.__path)
+        try:
+            self.assertEqual(cache.get(("key", 1)), (3, 5, None, (1, 7)))
+            self.assertIsNone(cache.get(("key", 2)))
+            self.assertEqual(cache.get_stats()["disk_hits"], 1)
+        finally:
+            cache.close()
+
+    def test_key_has_search_settings(self):
+        cache = result_cache.configure()
+        game = Game()
+        game.make_move(3)
+        col = AI(game, 2, DEPTH, seed=1).find_legal_move()
+        self.assertEqual(AI(game, 2, DEPTH, seed=1).find_legal_move(), col)
+        self.assertEqual(cache.get_stats()["hits"], 1)
+        AI(game, 2, DEPTH, seed=2).find_legal_move()
+        AI(game, 2, DEPTH, workers=2, seed=1).find_legal_move()
+        self.assertEqual(cache.get_stats()["hits"], 1)
+        self.assertEqual(cache.get_stats()["stores"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()